@@ -0,0 +1,243 @@
+"""asyncio path of the driver, over aiohttp (an optional dependency, imported when used).
+
+    async for person in Person.objects.filter(age__gt=30):
+        ...
+    count = await Person.objects.filter(name='Eggs').acount()
+    person = await Person.objects.aget(pk='123')
+    await person.asave()
+
+Each event loop has its own aiohttp session (see DatabaseWrapper.async_connection),
+with a pool of ASYNC_POOL_SIZE keep-alive sockets, so the queries of many
+coroutines run concurrently without a thread per query.
+"""
+import asyncio
+import base64
+from collections import deque
+from typing import Mapping, List, AsyncIterator, Tuple
+
+from arangodb_driver.codec import JSONCodec
+from arangodb_driver.cursor import OperationalError, ProgrammingError, bind_vars, database_error
+from arangodb_driver.defines import ASYNC_POOL_SIZE
+
+
+class AsyncConnection(object):
+    """An aiohttp session bound to a database of a server."""
+
+    def __init__(self, url: str, database: str, username: str, password: str, codec: JSONCodec,
+                 pool_size: int = ASYNC_POOL_SIZE):
+        self.prefix = '%s/_db/%s' % (url.rstrip('/'), database)
+        self.username = username
+        self.password = password
+        self.codec = codec
+        self.pool_size = pool_size
+        self._session = None
+
+    def __repr__(self):
+        return '<AsyncConnection %s>' % self.prefix
+
+    @property
+    def session(self):
+        if self._session is None:
+            import aiohttp
+            credentials = '%s:%s' % (self.username or 'root', self.password or '')
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers={'Authorization': 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')})
+        return self._session
+
+    async def request(self, method: str, endpoint: str, data=None, missing_ok: bool = False):
+        """Returns the decoded body of the response, the errors are raised as PEP-249 exceptions.
+
+        With missing_ok a 404 response returns None.
+        """
+        import aiohttp
+        body = None if data is None else self.codec.dumps(data)
+        try:
+            async with self.session.request(method, self.prefix + endpoint, data=body) as response:
+                status = response.status
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise OperationalError(str(error)) from error
+        try:
+            result = self.codec.loads(content) if content else {}
+        except ValueError:
+            result = {}
+        if status == 404 and missing_ok:
+            return None
+        if status >= 400:
+            error_code = result.get('errorNum') if isinstance(result, dict) else None
+            message = result.get('errorMessage') if isinstance(result, dict) else None
+            raise database_error(error_code, '[HTTP %s][ERR %s] %s' % (status, error_code, message))
+        return result
+
+    async def save_document(self, collection: str, document: Mapping) -> Tuple[Mapping, bool]:
+        """Updates the document with the _key of the given one, it's inserted if there is none.
+
+        Returns the _key, _id and _rev of the saved document and if it was inserted.
+        """
+        key = document.get('_key')
+        if key is not None:
+            result = await self.request('patch', '/_api/document/%s/%s' % (collection, key), document,
+                                        missing_ok=True)
+            if result is not None:
+                return result, False
+        return await self.request('post', '/_api/document/%s' % collection, document), True
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+
+class AsyncArangoCursor(object):
+    """The asyncio version of cursor.ArangoCursor, a PEP-249 like cursor over an AQL server cursor.
+
+    The fetch methods are coroutines and the rows can be read with async for.
+    """
+    arraysize = 1
+
+    def __init__(self, connection: AsyncConnection, batch_size: int = None, ttl: int = None, count: bool = False):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.count = count
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        # The statistics of the last query, as sent by the server (see ArangoCursor.stats).
+        self.stats = {}
+        self._executed = False
+        self._id = None
+        self._has_more = False
+        self._buffer = []
+        self._position = 0
+
+    def __aiter__(self):
+        return self.rows()
+
+    def set_options(self, batch_size: int = None, ttl: int = None, count: bool = None):
+        """Change the batch_size, ttl and count for the next queries (None keeps the current value)."""
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if ttl is not None:
+            self.ttl = ttl
+        if count is not None:
+            self.count = count
+
+    async def execute(self, aql: str, bind_vars_or_params=None):
+        """Executes the query, fetching only the first batch (see ArangoCursor.execute)."""
+        await self.close()
+        self.stats, self.rowcount = {}, -1
+        data = {'query': aql, 'count': self.count}
+        variables = bind_vars(bind_vars_or_params)
+        if variables:
+            data['bindVars'] = variables
+        if self.batch_size is not None:
+            data['batchSize'] = self.batch_size
+        if self.ttl is not None:
+            data['ttl'] = self.ttl
+        result = await self.connection.request('post', '/_api/cursor', data)
+        self._executed = True
+        self._load(result)
+        self.stats = result.get('extra', {}).get('stats') or {}
+        count = result.get('count')
+        if count is None:
+            count = -1 if self._has_more else len(self._buffer)
+        self.rowcount = self.stats.get('writesExecuted') or count
+
+    def _load(self, result: Mapping):
+        self._id = result.get('id', self._id)
+        self._has_more = result.get('hasMore', False)
+        self._buffer = result.get('result', [])
+        self._position = 0
+
+    async def _fetch_next_batch(self) -> bool:
+        """Replaces the buffer with the next batch from the server, returns False when there is none."""
+        if not self._executed:
+            raise ProgrammingError("execute() must be called before fetching rows.")
+        if not self._has_more:
+            self._buffer, self._position = [], 0
+            return False
+        self._load(await self.connection.request('put', '/_api/cursor/%s' % self._id))
+        return bool(self._buffer) or self._has_more
+
+    async def fetchone(self):
+        rows = await self.fetchmany(1)
+        return rows[0] if rows else None
+
+    async def fetchmany(self, size: int = None) -> List:
+        size = size or self.arraysize
+        rows = []
+        while len(rows) < size:
+            if self._position >= len(self._buffer) and not await self._fetch_next_batch():
+                break
+            end = self._position + size - len(rows)
+            rows.extend(self._buffer[self._position:end])
+            self._position = min(end, len(self._buffer))
+        return rows
+
+    async def fetchall(self) -> List:
+        return [row async for batch in self.batches() for row in batch]
+
+    async def batches(self) -> AsyncIterator[List]:
+        """Yields the remaining rows as they come from the server, one batch at a time."""
+        if not self._executed:
+            raise ProgrammingError("execute() must be called before fetching rows.")
+        while True:
+            if self._position < len(self._buffer):
+                batch = self._buffer[self._position:] if self._position else self._buffer
+                self._buffer, self._position = [], 0
+                yield batch
+            if not await self._fetch_next_batch():
+                return
+
+    async def rows(self):
+        async for batch in self.batches():
+            for row in batch:
+                yield row
+
+    async def close(self):
+        """Deletes the server cursor if it still has results, instead of waiting for its ttl."""
+        cursor_id, has_more = self._id, self._has_more
+        self._id, self._has_more, self._executed = None, False, False
+        self._buffer, self._position = [], 0
+        if cursor_id is not None and has_more:
+            await self.connection.request('delete', '/_api/cursor/%s' % cursor_id, missing_ok=True)
+
+
+async def async_cursor_iter(cursor: AsyncArangoCursor):
+    """Yields the batches of the cursor and ensures it's closed when done."""
+    try:
+        async for batch in cursor.batches():
+            yield batch
+    finally:
+        await cursor.close()
+
+
+async def no_batches():
+    """The batches of an empty result."""
+    return
+    yield
+
+
+class BatchFeed(object):
+    """The batches received by the asyncio path, handed one by one to the results iterator of a queryset.
+
+    It's the fetched_batches of the query (see SQLCompiler.execute_sql): the iterable
+    class of the queryset is created once and reads each batch once it was put, see
+    AQLQuerySet.__aiter__.
+    """
+
+    def __init__(self):
+        self.batches = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> List:
+        if not self.batches:
+            raise RuntimeError("The next batch was read before it was received.")
+        return self.batches.popleft()
+
+    def put(self, batch: List):
+        self.batches.append(batch)
@@ -1,4 +1,7 @@
+import asyncio
+import time
 import warnings
+import weakref
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -14,29 +17,23 @@ from django.utils.safestring import SafeBytes, SafeText
 
 from arango import ArangoClient
 
+from . import cursor as Database
+from .aio import AsyncArangoCursor, AsyncConnection
 from .client import DatabaseClient
+from .codec import get_codec
+from .cursor import ArangoCursor
+from .defines import (DRIVER_OPTIONS, COUNT, POOL_SIZE, POOL_MAX_IDLE, POOL_CHECK_AFTER, HEALTH_CHECK_INTERVAL,
+                      BREAKER_THRESHOLD, BREAKER_RESET, ASYNC_POOL_SIZE)
 from .features import DatabaseFeatures
 from .operations import DatabaseOperations
+from .pool import PoolKey, PooledConnection, connection_pool
+from .profiling import ProfilingCursorWrapper
 from .creation import DatabaseCreation
 from .introspection import DatabaseIntrospection
 from .schema import DatabaseSchemaEditor
-from typing import Mapping, List
-
-
-class PythonArangoCursor(object):
-    def __init__(self):
-        """Simulates a cursor with methods required by Django."""
-        pass
-
-    def close(self):
-        pass
-
-    def execute(self, aql: str, params: Mapping) -> List:
-        print(aql)
-        print(params)
-
-    def fetchmany(self, chunk_size):
-        return []
+from .transport import CodecHTTPClient, LoadBalancingHTTPClient, base_url, open_database
+from .watchdog import QueryWatchdog
+from typing import Mapping
 
 
 class DatabaseWrapper(BaseDatabaseWrapper):
@@ -49,6 +46,12 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     vendor = 'arangodb'
     queries_limit = 9000
+    # PEP-249 exceptions, used by Django to wrap the database errors.
+    Database = Database
+    # The client borrowed from the pool by get_new_connection.
+    pooled_connection = None
+    # The AsyncConnection of each event loop (see async_connection).
+    async_connections = None
 
     # Mapping of Field objects to their SQL suffix such as AUTOINCREMENT.
     data_types_suffix = {}
@@ -100,7 +103,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
 
     def _close(self):
-        pass
+        """Returns the client to the pool, it keeps its HTTP session."""
+        pooled_connection, self.pooled_connection = self.pooled_connection, None
+        if pooled_connection is not None:
+            connection_pool.release(pooled_connection, max_size=self.driver_options.get('POOL_SIZE', POOL_SIZE))
 
     def get_connection_params(self):
         """Returns a dict of parameters suitable for get_new_connection.
@@ -126,7 +132,8 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         # We will use that latter:
         self.database_name = settings_dict['NAME']
 
-        conn_params.update(settings_dict['OPTIONS'])
+        conn_params.update({key: value for key, value in dict(settings_dict['OPTIONS']).items()
+                            if key not in DRIVER_OPTIONS})
         conn_params.pop('isolation_level', None)
         if settings_dict['USER']:
             conn_params['username'] = settings_dict['USER']
@@ -136,8 +143,22 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             conn_params['host'] = settings_dict['HOST']
         if settings_dict['PORT']:
             conn_params['port'] = settings_dict['PORT']
+        if settings_dict.get('HOSTS'):
+            # The coordinators of a cluster, as 'host:port' or 'http://host:port' (see LoadBalancingHTTPClient).
+            conn_params['hosts'] = tuple(settings_dict['HOSTS'])
         return conn_params
 
+    @cached_property
+    def driver_options(self) -> Mapping:
+        """The options from DATABASES['OPTIONS'] that are handled by the driver (see defines.DRIVER_OPTIONS)."""
+        options = dict(self.settings_dict.get('OPTIONS') or {})
+        return {key: value for key, value in options.items() if key in DRIVER_OPTIONS}
+
+    @cached_property
+    def watchdog(self) -> QueryWatchdog:
+        """Reports the slow and full scan queries, None if not enabled by the OPTIONS (see watchdog.py)."""
+        return QueryWatchdog.from_options(self.driver_options)
+
     def get_new_connection(self, conn_params)->ArangoClient:
         """Opens a connection to the database.
 
@@ -148,25 +169,116 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             username='root',
             password='',
             enable_logging=True)
+
+        The client is borrowed from the process wide pool (see pool.py), it's only
+        created if there is no idle client for the same server, user and database.
         """
         database = conn_params.pop('database')
-        connection = ArangoClient(**conn_params)
-        database = connection.database(database)
+        # The bodies of the requests and responses go through the JSON_CODEC.
+        codec = get_codec(self.driver_options.get('JSON_CODEC'))
+        host = conn_params.get('hosts') or conn_params.get('host')
+        key = PoolKey(conn_params.get('protocol'), host, conn_params.get('port'), conn_params.get('username'),
+                      conn_params.get('password'), database, codec.name)
+        self.pooled_connection = connection_pool.acquire(
+            key, lambda: self.open_connection(key, conn_params, codec),
+            max_idle=self.driver_options.get('POOL_MAX_IDLE', POOL_MAX_IDLE),
+            check_after=self.driver_options.get('POOL_CHECK_AFTER', POOL_CHECK_AFTER))
 
         # FIXME: Very dangerous and not intuitive to set a database property here.
         # may be better to use an extra layer: A wrapper class that combine the functionality.
-        self.database = database
-
-        return connection
+        self.database = self.pooled_connection.database
+
+        return self.pooled_connection.client
+
+    def open_connection(self, key: PoolKey, conn_params, codec) -> PooledConnection:
+        """Creates the client and the database of a new pooled connection."""
+        conn_params = dict(conn_params)
+        hosts = conn_params.pop('hosts', None)
+        if 'http_client' not in conn_params:
+            session_params = {'use_session': conn_params.pop('use_session', True),
+                              'check_cert': conn_params.pop('check_cert', True)}
+            if hosts:
+                options = self.driver_options
+                conn_params['http_client'] = LoadBalancingHTTPClient(
+                    codec, hosts, strategy=options.get('LOAD_BALANCING'),
+                    threshold=options.get('BREAKER_THRESHOLD', BREAKER_THRESHOLD),
+                    reset_after=options.get('BREAKER_RESET', BREAKER_RESET), **session_params)
+            else:
+                conn_params['http_client'] = CodecHTTPClient(codec, **session_params)
+        client = ArangoClient(**conn_params)
+        return PooledConnection(key, client, open_database(client, key.database, codec))
+
+    @property
+    def health_checked_at(self):
+        """Last time the server was verified (time.monotonic()), kept by the pooled client across checkouts."""
+        return self.pooled_connection.checked_at if self.pooled_connection is not None else None
+
+    @health_checked_at.setter
+    def health_checked_at(self, value):
+        if self.pooled_connection is not None:
+            self.pooled_connection.checked_at = value
 
     def init_connection_state(self):
         """Initializes the database connection settings."""
         pass
 
-    def create_cursor(self):
+    def create_cursor(self, name=None):
         """Creates a cursor. Assumes that a connection is established."""
-        # FIXME: Wrap the query result cursor.
-        return PythonArangoCursor()
+        return ArangoCursor(self.database, batch_size=self.driver_options.get('BATCH_SIZE'),
+                            ttl=self.driver_options.get('TTL'), reconnect=self.reconnect,
+                            count=self.driver_options.get('COUNT', COUNT))
+
+    def make_debug_cursor(self, cursor):
+        """The queries are logged with the statistics of the server, see profiling.py."""
+        return ProfilingCursorWrapper(cursor, self)
+
+    def make_cursor(self, cursor):
+        # Without DEBUG the queries are still sent to the receivers of query_executed.
+        return ProfilingCursorWrapper(cursor, self)
+
+    def api(self, method: str, endpoint: str, data=None, params=None):
+        """Sends a request to the HTTP API of the database (indexes, graphs...), returns the decoded body.
+
+        The errors are raised as PEP-249 exceptions, as the ones of the cursors.
+        """
+        self.ensure_connection()
+        with self.wrap_database_errors:
+            response = getattr(self.database._conn, method)(endpoint, data=data, params=params)
+            if response.status_code >= 400:
+                raise Database.database_error(response.error_code, '[HTTP %s][ERR %s] %s' % (
+                    response.status_code, response.error_code, response.error_message))
+        return response.body
+
+    def async_connection(self) -> AsyncConnection:
+        """The aiohttp connection of the running event loop, each loop has its own session."""
+        loop = asyncio.get_event_loop()
+        if self.async_connections is None:
+            self.async_connections = weakref.WeakKeyDictionary()
+        connection = self.async_connections.get(loop)
+        if connection is None:
+            params = self.get_connection_params()
+            if params.get('hosts'):
+                url = base_url(params['hosts'][0], params.get('protocol', 'http'))
+            else:
+                url = '%s://%s:%s' % (params.get('protocol', 'http'), params.get('host', '127.0.0.1'),
+                                      params.get('port', 8529))
+            connection = AsyncConnection(url, params['database'], params.get('username'), params.get('password'),
+                                         get_codec(self.driver_options.get('JSON_CODEC')),
+                                         pool_size=self.driver_options.get('ASYNC_POOL_SIZE', ASYNC_POOL_SIZE))
+            self.async_connections[loop] = connection
+        return connection
+
+    def async_cursor(self) -> AsyncArangoCursor:
+        """Creates a cursor of the asyncio path (see aio.py)."""
+        return AsyncArangoCursor(self.async_connection(), batch_size=self.driver_options.get('BATCH_SIZE'),
+                                 ttl=self.driver_options.get('TTL'), count=self.driver_options.get('COUNT', COUNT))
+
+    async def aclose(self):
+        """Closes the aiohttp session of the running event loop."""
+        if self.async_connections is not None:
+            connection = self.async_connections.pop(asyncio.get_event_loop(), None)
+            if connection is not None:
+                await connection.close()
 
     def _set_autocommit(self, autocommit):
         """
@@ -177,12 +289,39 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     def ensure_connection(self):
         """
         Guarantees that a connection to the database is established.
+
+        The server is verified (a HEAD request) on the first use of the connection
+        and then at most once every HEALTH_CHECK_INTERVAL seconds. A connection lost
+        in between is reopened by the cursor (see ArangoCursor.execute).
         """
-        try:
-            self.connection.verify()
-        except AttributeError:
+        if self.connection is None:
             self.connect()
-            self.connection.verify()
+        interval = self.driver_options.get('HEALTH_CHECK_INTERVAL', HEALTH_CHECK_INTERVAL)
+        now = time.monotonic()
+        if self.health_checked_at is None or now - self.health_checked_at >= interval:
+            self.database.verify()
+            self.health_checked_at = now
+
+    def is_usable(self) -> bool:
+        """Used by Django to close the connection after an error, if the server can't be reached."""
+        try:
+            self.database.verify()
+        except Exception:
+            return False
+        self.health_checked_at = time.monotonic()
+        return True
+
+    def reconnect(self):
+        """Discards the client (it's not returned to the pool) and opens a new connection.
+
+        Returns the new database, it's used by the cursors when the connection was lost.
+        """
+        pooled_connection, self.pooled_connection = self.pooled_connection, None
+        if pooled_connection is not None:
+            pooled_connection.close()
+        self.connection = None
+        self.connect()
+        return self.database
 
     def set_autocommit(self, autocommit, force_begin_transaction_with_broken_autocommit=False):
         """
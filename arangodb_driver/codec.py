@@ -0,0 +1,110 @@
+"""JSON codecs used for the bodies of the requests and responses.
+
+The codec is chosen by DATABASES['OPTIONS']['JSON_CODEC']:
+
+* 'json': the standard library (default).
+* 'orjson': https://github.com/ijl/orjson
+* 'msgspec': https://github.com/jcrist/msgspec
+
+Decimal values are encoded as strings, a number would be read back as a double and lose
+precision. Date, time and datetime are encoded as ISO 8601 strings.
+"""
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+
+from arangodb_driver.defines import JSON_CODEC
+
+
+def encode_default(obj):
+    """Encodes the types that are not JSON natively."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
+class JSONCodec(object):
+    """The standard library codec, also the interface of the other codecs.
+
+    dumps() returns a str (python-arango only sends strings as they are) and
+    loads() accepts str or bytes, raising ValueError for invalid documents.
+    """
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(default=encode_default, separators=(',', ':'), ensure_ascii=False)
+        self._decoder = json.JSONDecoder()
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+    def dumps(self, obj) -> str:
+        return self._encoder.encode(obj)
+
+    def loads(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return self._decoder.decode(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj) -> str:
+        return self._orjson.dumps(obj, default=encode_default, option=self._options).decode('utf-8')
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._error = msgspec.DecodeError
+        self._encoder = msgspec.json.Encoder(enc_hook=encode_default, decimal_format='string')
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj) -> str:
+        return self._encoder.encode(obj).decode('utf-8')
+
+    def loads(self, data):
+        try:
+            return self._decoder.decode(data)
+        except self._error as error:
+            raise ValueError(str(error)) from error
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, OrjsonCodec, MsgspecCodec)}
+
+_codecs = {}
+
+
+def get_codec(name: str = None) -> JSONCodec:
+    """Returns the (shared) codec with the given name, the default one if the name is None."""
+    name = name or JSON_CODEC
+    try:
+        return _codecs[name]
+    except KeyError:
+        pass
+    try:
+        codec_class = CODECS[name]
+    except KeyError:
+        raise ImproperlyConfigured("JSON_CODEC must be one of: {}.".format(', '.join(sorted(CODECS))))
+    try:
+        codec = codec_class()
+    except ImportError as error:
+        raise ImproperlyConfigured("The JSON_CODEC '%s' is not installed: %s" % (name, error)) from error
+    return _codecs.setdefault(name, codec)
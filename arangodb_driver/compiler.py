@@ -1,17 +1,31 @@
+import itertools
 import json
-from typing import List
+import operator
+import re
+import time
+from collections import namedtuple
+from typing import List, Dict, Iterator
 
-from django.core.exceptions import EmptyResultSet
+from django.core.exceptions import EmptyResultSet, FieldError
 from django.db import DatabaseError
 from django.db import IntegrityError
 from django.db.models import NOT_PROVIDED
-from django.db.models.expressions import Col
+from django.db.models.aggregates import Count
+from django.db.models.expressions import Col, OrderBy, Ref, Star
+from django.db.models.fields.related import ForeignObjectRel
+from django.db.models.lookups import In, Lookup, Range
 from django.db.models.sql import compiler
 from django.db.models.sql.constants import MULTI, NO_RESULTS, CURSOR, SINGLE
+from django.db.models.sql.where import WhereNode, AND
 from django.db.transaction import TransactionManagementError
 
-from arangodb_driver.defines import ITEM_ALIAS
+from arangodb_driver import cursor as Database
+from arangodb_driver.aio import async_cursor_iter, no_batches
+from arangodb_driver.cursor import wrap_arango_errors
+from arangodb_driver.defines import ITEM_ALIAS, EDGE_ALIAS, PATH_ALIAS, START_ALIAS, JOIN_ALIAS_PREFIX, BIND_VAR_PREFIX
 from arangodb_driver.models.aql.query import AQLQuery
+from arangodb_driver.profiling import is_profiled, record_query
+from arangodb_driver.querycache import aql_cache
 
 
 
@@ -30,10 +44,109 @@ def override_col_as_sql(self, compiler, connection) -> (str, List):
         return super(Expression, self).as_sql(compiler, connection)
     setattr(Expression, 'as_' + connection.vendor, override_as_sql)
     """
-    return "%s.%s" % (ITEM_ALIAS, self.target.column), []
+    return "%s.%s" % (compiler.get_document_variable(self.alias), self.target.column), []
 setattr(Col, 'as_arangodb', override_col_as_sql)
 
 
+def override_in_as_sql(self, compiler, connection) -> (str, List):
+    """AQL compares against an array, so the whole list is sent as a single parameter."""
+    if not self.rhs_is_direct_value():
+        return self.as_sql(compiler, connection)
+    lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+    _, rhs_params = self.process_rhs(compiler, connection)
+    return '%s IN %%s' % lhs_sql, list(lhs_params) + [list(rhs_params)]
+setattr(In, 'as_arangodb', override_in_as_sql)
+
+
+def override_range_as_sql(self, compiler, connection) -> (str, List):
+    """AQL has no BETWEEN, the field is compared with both bounds."""
+    if not self.rhs_is_direct_value():
+        return self.as_sql(compiler, connection)
+    lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+    _, (low, high) = self.process_rhs(compiler, connection)
+    return '(%s >= %%s AND %s <= %%s)' % (lhs_sql, lhs_sql), list(lhs_params) + [low] + list(lhs_params) + [high]
+setattr(Range, 'as_arangodb', override_range_as_sql)
+
+
+def override_ref_as_sql(self, compiler, connection) -> (str, List):
+    """A reference to a column of a subquery, its rows are objects with the alias as attribute."""
+    return "%s.%s" % (ITEM_ALIAS, self.refs), []
+setattr(Ref, 'as_arangodb', override_ref_as_sql)
+
+
+def is_count_all(annotation) -> bool:
+    """True for Count('*'), that can be computed with COLLECT WITH COUNT INTO."""
+    return (isinstance(annotation, Count) and not annotation.extra.get('distinct') and
+            isinstance(annotation.source_expressions[0], Star))
+
+
+def override_count_as_sql(self, compiler, connection) -> (str, List):
+    """COUNT counts the documents in a COLLECT AGGREGATE, null values included.
+
+    Count('field') only counts the non null values, as in SQL. COUNT_DISTINCT counts
+    null as a value.
+    """
+    expression = self.source_expressions[0]
+    if isinstance(expression, Star):
+        return 'LENGTH(1)', []
+    sql, params = compiler.compile(expression)
+    if self.extra.get('distinct'):
+        return 'COUNT_DISTINCT(%s)' % sql, params
+    return 'SUM(%s == null ? 0 : 1)' % sql, params
+setattr(Count, 'as_arangodb', override_count_as_sql)
+
+
+_placeholder_re = re.compile(r'%[s%]')
+
+
+def bind_placeholders(sql: str, start: int = 0) -> str:
+    """Replace the %s placeholders produced by Django with numbered AQL bind parameters.
+
+    The n-th placeholder becomes @p<start + n>, so the params list of the query maps
+    directly to its bind variables (see `cursor.bind_vars`).
+    """
+    counter = itertools.count(start)
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        return '@%s%d' % (BIND_VAR_PREFIX, next(counter))
+    return _placeholder_re.sub(replace, sql)
+
+
+def cursor_iter(cursor):
+    """Yields the batches of the cursor and ensures it's closed when done."""
+    try:
+        yield from cursor.batches()
+    finally:
+        cursor.close()
+
+
+class UncacheableQuery(Exception):
+    """The query uses a node that can't be described by `where_shape`."""
+
+
+# Lookups whose AQL does not depend on the value being compared.
+CACHEABLE_LOOKUPS = {
+    'exact', 'iexact', 'gt', 'gte', 'lt', 'lte', 'contains', 'icontains', 'startswith',
+    'istartswith', 'endswith', 'iendswith', 'regex', 'iregex', 'range',
+}
+
+
+def where_shape(node):
+    """Returns a hashable description of a where tree, without its values."""
+    if isinstance(node, WhereNode):
+        return node.connector, node.negated, tuple(where_shape(child) for child in node.children)
+    if isinstance(node, Lookup) and isinstance(node.lhs, Col) and node.rhs_is_direct_value():
+        if node.lookup_name in CACHEABLE_LOOKUPS:
+            return node.lookup_name, node.lhs.alias, node.lhs.target.column
+        if node.lookup_name == 'in':
+            # An empty list never reaches the database.
+            return node.lookup_name, node.lhs.alias, node.lhs.target.column, bool(node.rhs)
+    raise UncacheableQuery(node)
+
+
+CompiledAQL = namedtuple('CompiledAQL', ['sql', 'select', 'klass_info', 'annotation_col_map', 'col_count'])
 
 
 class SQLCompiler(compiler.SQLCompiler):
@@ -48,55 +161,86 @@ class SQLCompiler(compiler.SQLCompiler):
         in the query.
         """
         self.subquery = subquery
+        shape = self.get_query_shape(with_limits, with_col_aliases, subquery)
+        if shape is not None:
+            compiled = aql_cache.get(shape)
+            if compiled is not None:
+                return self.as_cached_sql(compiled, with_limits)
         refcounts_before = self.query.alias_refcount.copy()
 
         try:
             extra_select, order_by, group_by = self.pre_sql_setup()
             distinct_fields = self.get_distinct()
             from_, f_params = self.get_from_clause()
-            where, w_params = self.compile(self.where) if self.where is not None else ("", [])
+            source, where, params = self.compile_filters()
             having, h_params = self.compile(self.having) if self.having is not None else ("", [])
 
-            params = []
-            result = ['FOR', ITEM_ALIAS, 'IN']
-            result.extend(from_)
+            if getattr(self.query, 'traversal', None) is not None:
+                # The source of a traversal is the whole FOR (see get_traversal_sql).
+                result = [source]
+            else:
+                result = ['FOR', ITEM_ALIAS, 'IN']
+                if source:
+                    result.append(source)
+                else:
+                    # The joined tables are read by the LETs of get_join_sql().
+                    result.extend(from_[:1])
+
+            sort_sql = self.get_sort_sql(order_by, params) if order_by else ''
+            # values().annotate(): the rows are the groups of a COLLECT, sorted and limited after it.
+            grouped = bool(group_by) and not self.is_aggregation()
+            if grouped and distinct_fields:
+                raise NotImplementedError("annotate() + distinct(fields) is not implemented.")
+            # The joined documents are read after the LIMIT, only for the page, unless they are filtered or sorted.
+            join_sql = self.get_join_sql()
+            joins_first = any('%s.' % variable in where or '%s.' % variable in sort_sql
+                              for variable in self.get_join_variables())
+            if joins_first:
+                result.extend(join_sql)
 
             # Append the FILTER (sql where).
             if where:
                 result.append('FILTER')
-                # quoted_params = quote_params(w_params)
-                # where_partial = where % tuple(quoted_params)
-                where_partial = where % tuple(w_params)
-                result.append(where_partial)
-
-                # result.append('FILTER %s ' % where % '"%s"' % w_params[0])  # FIXME: Looks like a hack right now...
-                params.extend(w_params)
-
-            result.append('RETURN')
-
-            if self.query.distinct:
-                result.append(self.connection.ops.distinct_sql(distinct_fields))
+                result.append(where)
+
+            # SORT and LIMIT come before the RETURN, only the page is transferred.
+            if sort_sql and not grouped:
+                result.append(sort_sql)
+
+            # A LIMIT before RETURN DISTINCT would count the duplicates, the distinct rows are limited
+            # by an outer FOR instead.
+            limit_outer = self.query.distinct and not self.is_aggregation()
+            if with_limits and not limit_outer and not grouped:
+                limit_sql, limit_params = self.get_limits(len(params))
+                result.extend(limit_sql)
+                params.extend(limit_params)
+
+            if self.is_aggregation():
+                if not joins_first:
+                    # The aggregates may read the joined documents.
+                    result.extend(join_sql)
+                aggregation_sql, a_params = self.get_aggregation_sql(len(params))
+                result.append(aggregation_sql)
+                params.extend(a_params)
+            elif grouped:
+                if not joins_first:
+                    result.extend(join_sql)
+                result.extend(self.get_grouping_sql(group_by, having, h_params, sort_sql, params, with_limits))
+            else:
+                if not joins_first:
+                    result.extend(join_sql)
+                result.append('RETURN')
 
-            out_cols = {}
-            col_idx = 1
+                if self.query.distinct:
+                    result.append(self.connection.ops.distinct_sql(distinct_fields))
 
-            for _, (s_sql, s_params), alias in self.select + extra_select:
-                if alias:
-                    s_sql = '%s AS %s' % (s_sql, self.connection.ops.quote_name(alias))
-                elif with_col_aliases:
-                    s_sql = '%s AS %s' % (s_sql, 'Col%d' % col_idx)
-                    col_idx += 1
-                params.extend(s_params)
+                result.append(self.get_projection_sql(extra_select, params, with_col_aliases))
 
-                # Prepare the dict output ITEM_ALIAS.
-                field_name = s_sql.split('.')[1]  # TODO: The alias is used here.
-                prepared_s_sql = ITEM_ALIAS + '.' + field_name
-                out_cols[field_name] = prepared_s_sql
-
-            # Transform the dict into a AQL return object.
-            out_cols = str(out_cols).replace("'", "")
-            result.append(out_cols)
-            params.extend(f_params)
+                if with_limits and limit_outer:
+                    limit_sql, limit_params = self.get_limits(len(params))
+                    if limit_sql:
+                        result = ['FOR row IN (%s)' % ' '.join(result)] + limit_sql + ['RETURN row']
+                        params.extend(limit_params)
 
             for_update_part = None
             if self.query.select_for_update and self.connection.features.has_select_for_update:
@@ -117,49 +261,342 @@ class SQLCompiler(compiler.SQLCompiler):
             if for_update_part and self.connection.features.for_update_after_from:
                 result.append(for_update_part)
 
-            grouping = []
-            for g_sql, g_params in group_by:
-                grouping.append(g_sql)
-                params.extend(g_params)
-            if grouping:
-                if distinct_fields:
-                    raise NotImplementedError(
-                        "annotate() + distinct(fields) is not implemented.")
-                if not order_by:
-                    order_by = self.connection.ops.force_no_ordering()
-                result.append('GROUP BY %s' % ', '.join(grouping))
-
-            if having:
-                result.append('HAVING %s' % having)
-                params.extend(h_params)
-
-            if order_by:
-                ordering = []
-                for _, (o_sql, o_params, _) in order_by:
-                    ordering.append(o_sql)
-                    params.extend(o_params)
-                result.append('ORDER BY %s' % ', '.join(ordering))
-
-            if with_limits:
-                if self.query.high_mark is not None:
-                    result.append('LIMIT %d' % (self.query.high_mark - self.query.low_mark))
-                if self.query.low_mark:
-                    if self.query.high_mark is None:
-                        val = self.connection.ops.no_limit_value()
-                        if val:
-                            result.append('LIMIT %d' % val)
-                    result.append('OFFSET %d' % self.query.low_mark)
-
             if for_update_part and not self.connection.features.for_update_after_from:
                 result.append(for_update_part)
 
             result = ' '.join(result), tuple(params)
+            if shape is not None:
+                aql_cache.set(shape, CompiledAQL(result[0], self.select, self.klass_info,
+                                                 self.annotation_col_map, self.col_count))
             return result
         finally:
             # Finally do cleanup - get rid of the joins we created above.
             self.query.reset_refcounts(refcounts_before)
 
-    def execute_sql(self, result_type=MULTI):
+    def get_document_variable(self, alias: str) -> str:
+        """The AQL variable of the documents of a table alias, ITEM_ALIAS for the base table.
+
+        The joined documents are rel1, rel2... by the position of their alias in the query.
+        """
+        join = self.query.alias_map.get(alias)
+        if join is None or join.join_type is None:
+            return ITEM_ALIAS
+        return '%s%d' % (JOIN_ALIAS_PREFIX, list(self.query.alias_map).index(alias))
+
+    def get_join_variables(self) -> List[str]:
+        return [self.get_document_variable(alias) for alias in self.get_joined_aliases()]
+
+    def get_joined_aliases(self) -> List[str]:
+        return [alias for alias in self.query.tables
+                if self.query.alias_refcount[alias] and alias in self.query.alias_map and
+                self.query.alias_map[alias].join_type is not None]
+
+    def get_join_sql(self) -> List[str]:
+        """Returns a LET for each joined table (select_related, filters over foreign keys).
+
+        The related document is read by its key, or by a subquery when the foreign
+        key points to another attribute:
+
+            LET rel1 = DOCUMENT("Person", item._from)
+            LET rel2 = FIRST(FOR doc IN Group FILTER doc.code == rel1.group_code LIMIT 1 RETURN doc)
+
+        A missing document is null, so are its attributes. Only the joins along foreign
+        keys are implemented, a join can't multiply the rows.
+        """
+        lets = []
+        for alias in self.get_joined_aliases():
+            join = self.query.alias_map[alias]
+            if isinstance(join.join_field, ForeignObjectRel) or len(join.join_cols) != 1:
+                raise NotImplementedError(
+                    "Only joins along foreign keys are implemented, not along '%s'." % join.join_field)
+            (parent_column, column), = join.join_cols
+            parent = '%s.%s' % (self.get_document_variable(join.parent_alias), parent_column)
+            if join.join_field.foreign_related_fields[0].primary_key:
+                document = 'DOCUMENT("%s", %s)' % (join.table_name, parent)
+            else:
+                document = 'FIRST(FOR doc IN %s FILTER doc.%s == %s LIMIT 1 RETURN doc)' % (
+                    join.table_name, column, parent)
+            lets.append('LET %s = %s' % (self.get_document_variable(alias), document))
+        return lets
+
+    def get_projection_sql(self, extra_select, params: List, with_col_aliases: bool = False) -> str:
+        """Returns the expression of the RETURN, extending params with the params of the selected expressions.
+
+        Rows are arrays with the selected columns in the order of self.select, the
+        deferred attributes are not transferred:
+
+            RETURN [item._key, item.name]
+
+        With col aliases (a subquery of AggregateQuery) the rows are objects, the outer
+        query reads the columns by name (see override_ref_as_sql):
+
+            RETURN {"_key": item._key, "__col1": item.age}
+        """
+        columns = []
+        for col, (s_sql, s_params), alias in self.select + extra_select:
+            s_sql = bind_placeholders(s_sql, len(params))
+            params.extend(s_params)
+            if with_col_aliases:
+                s_sql = '"%s": %s' % (alias or col.target.column, s_sql)
+            columns.append(s_sql)
+        if not columns:
+            # Nothing is read by exists(), there is no need to transfer the documents.
+            return '1'
+        if with_col_aliases:
+            return '{%s}' % ', '.join(columns)
+        return '[%s]' % ', '.join(columns)
+
+    def is_aggregation(self) -> bool:
+        """True if the query only selects aggregates (aggregate(), count()), computed by the server."""
+        query = self.query
+        return (not query.default_cols and not query.select and not query.extra_select and
+                bool(query.annotation_select) and query.group_by is None and
+                all(annotation.contains_aggregate for annotation in query.annotation_select.values()))
+
+    def get_aggregation_sql(self, start: int) -> (str, List):
+        """Returns the COLLECT of the aggregates and its params, each row is a list with their values.
+
+            COLLECT WITH COUNT INTO a0 RETURN [a0]
+            COLLECT AGGREGATE a0 = SUM(item.age), a1 = MAX(item.age) RETURN [a0, a1]
+        """
+        annotations = list(self.query.annotation_select.values())
+        names = ['a%d' % idx for idx in range(len(annotations))]
+        if len(annotations) == 1 and is_count_all(annotations[0]):
+            return 'COLLECT WITH COUNT INTO %s RETURN [%s]' % (names[0], names[0]), []
+        aggregates, params = [], []
+        for name, annotation in zip(names, annotations):
+            a_sql, a_params = self.compile(annotation)
+            aggregates.append('%s = %s' % (name, bind_placeholders(a_sql, start + len(params))))
+            params.extend(a_params)
+        return 'COLLECT AGGREGATE %s RETURN [%s]' % (', '.join(aggregates), ', '.join(names)), params
+
+    def get_grouping_sql(self, group_by, having: str, h_params: List, sort_sql: str, params: List,
+                         with_limits: bool) -> List[str]:
+        """Returns the COLLECT of a values().annotate() query, extending params, each row is a group.
+
+            COLLECT g0 = rel1.name AGGREGATE a0 = SUM(item._key == null ? 0 : 1)
+            FILTER a0 > @p0 SORT a0 DESC RETURN [g0, a0]
+
+        The HAVING and the SORT refer to the variables of the COLLECT instead of the
+        expressions of the groups and aggregates.
+        """
+        variables = {}
+        keys = []
+        for g_sql, g_params in group_by:
+            g_sql = bind_placeholders(g_sql, len(params))
+            params.extend(g_params)
+            if g_sql not in variables:
+                variables[g_sql] = 'g%d' % len(keys)
+                keys.append('%s = %s' % (variables[g_sql], g_sql))
+        aggregates, columns = [], []
+        for col, (s_sql, s_params), alias in self.select:
+            s_sql = bind_placeholders(s_sql, len(params))
+            if s_sql not in variables:
+                if not getattr(col, 'contains_aggregate', False):
+                    raise NotImplementedError("The selected expression %s is neither grouped nor aggregated." % s_sql)
+                params.extend(s_params)
+                variables[s_sql] = 'a%d' % len(aggregates)
+                aggregates.append('%s = %s' % (variables[s_sql], s_sql))
+            columns.append(variables[s_sql])
+
+        def replace_expressions(sql: str) -> str:
+            for expression in sorted(variables, key=len, reverse=True):
+                sql = sql.replace(expression, variables[expression])
+            return sql
+
+        result = ['COLLECT', ', '.join(keys)]
+        if aggregates:
+            result.extend(['AGGREGATE', ', '.join(aggregates)])
+        if having:
+            result.extend(['FILTER', replace_expressions(bind_placeholders(having, len(params)))])
+            params.extend(h_params)
+        if sort_sql:
+            result.append(replace_expressions(sort_sql))
+        if with_limits:
+            limit_sql, limit_params = self.get_limits(len(params))
+            result.extend(limit_sql)
+            params.extend(limit_params)
+        result.append('RETURN [%s]' % ', '.join(columns))
+        return result
+
+    def has_results(self) -> bool:
+        """The query is limited to one result by Query.has_results and returns 1, not the document."""
+        return self.execute_sql(SINGLE) is not None
+
+    def split_key_lookup(self):
+        """Returns the exact or in lookup on _key of the where (if any) and the rest of the where.
+
+        Only lookups that must be true for every result are considered, the children of
+        a top level AND. DOCUMENT() reads by _key: a pk stored in another attribute (the
+        pk of a child model, a custom db_column) is filtered as any other field.
+        """
+        where = self.where
+        pk = self.query.get_meta().pk
+        if where is None or where.negated or where.connector != AND or pk.column != '_key':
+            return None, where
+        for child in where.children:
+            if (isinstance(child, Lookup) and child.lookup_name in ('exact', 'in') and
+                    isinstance(child.lhs, Col) and child.lhs.target is pk and child.rhs_is_direct_value()):
+                rest = [other for other in where.children if other is not child]
+                return child, where.__class__(rest, where.connector, where.negated)
+        return None, where
+
+    def compile_filters(self) -> (str, str, List):
+        """Returns the source of the FOR (None for the collection), the FILTER and their params.
+
+        A query on _key reads the documents with DOCUMENT("Person", @p0) instead of
+        filtering the collection, the key (or the list of keys) is the first param:
+
+            FOR item IN DOCUMENT("Person", [@p0]) FILTER item.age == @p1 RETURN ...
+
+        The source of a query of AQLQuerySet.traverse() is the whole FOR of the traversal (see get_traversal_sql).
+        """
+        if getattr(self.query, 'traversal', None) is not None:
+            key_lookup, where_node = None, self.where
+            source, params = self.get_traversal_sql()
+        else:
+            key_lookup, where_node = self.split_key_lookup()
+            source, params = None, []
+        if key_lookup is not None:
+            _, key_params = key_lookup.process_rhs(self, self.connection)
+            if key_lookup.lookup_name == 'in':
+                key_sql, key_params = '%s', [list(key_params)]
+            else:
+                key_sql = '[%s]'
+            source = 'DOCUMENT("%s", %s)' % (self.query.get_meta().db_table, bind_placeholders(key_sql))
+            params.extend(key_params)
+        where, w_params = self.compile(where_node) if where_node is not None else ("", [])
+        where = bind_placeholders(where, len(params))
+        params.extend(w_params)
+        return source, where, params
+
+    def get_traversal_sql(self) -> (str, List):
+        """Returns the FOR of a traversal and its params, the start _id (or _ids) is the first one.
+
+            FOR item, edge, path IN 1..3 OUTBOUND @p0 Belongs PRUNE item.name == @p1
+                OPTIONS {"uniqueVertices": "path"} FILTER IS_SAME_COLLECTION("Group", item)
+
+        From many vertices, each one is traversed in turn:
+
+            FOR start IN @p0 FOR item, edge, path IN 1..1 OUTBOUND start Belongs ...
+
+        The name of a named graph is the param after the start: ... ANY @p0 GRAPH @p1 ...
+
+        Only the vertices of the model of the query are returned.
+        """
+        traversal = self.query.traversal
+        params = [list(traversal.start) if isinstance(traversal.start, tuple) else traversal.start]
+        result = []
+        if isinstance(traversal.start, tuple):
+            result.extend(['FOR', START_ALIAS, 'IN', bind_placeholders('%s')])
+            start_sql = START_ALIAS
+        else:
+            start_sql = bind_placeholders('%s')
+        result.extend(['FOR', '%s, %s, %s' % (ITEM_ALIAS, EDGE_ALIAS, PATH_ALIAS), 'IN',
+                       '%d..%d' % (traversal.min_depth, traversal.max_depth), traversal.direction.upper(),
+                       start_sql])
+        if traversal.graph is not None:
+            result.extend(['GRAPH', bind_placeholders('%s', len(params))])
+            params.append(traversal.graph)
+        else:
+            result.append(', '.join(traversal.edge_collections))
+        if traversal.prune is not None:
+            prune_sql, prune_params = self.compile(traversal.prune)
+            result.append('PRUNE %s' % bind_placeholders(prune_sql, len(params)))
+            params.extend(prune_params)
+        options = {}
+        if traversal.unique_vertices is not None:
+            options['uniqueVertices'] = traversal.unique_vertices
+        if traversal.bfs:
+            options['bfs'] = True
+        if options:
+            result.append('OPTIONS %s' % json.dumps(options))
+        result.append('FILTER IS_SAME_COLLECTION("%s", %s)' % (self.query.get_meta().db_table, ITEM_ALIAS))
+        return ' '.join(result), params
+
+    def get_sort_sql(self, order_by, params: List) -> str:
+        """Returns the SORT of the query, extending params with the params of its expressions.
+
+            SORT item.age DESC, item.name ASC
+
+        order_by('?') becomes SORT RAND() (see DatabaseOperations.random_function_sql).
+        """
+        ordering = []
+        for resolved, (o_sql, o_params, is_ref) in order_by:
+            if is_ref:
+                # The annotation isn't an attribute of the document, its expression is sorted instead.
+                resolved = OrderBy(resolved.expression.source, descending=resolved.descending)
+                o_sql, o_params = self.compile(resolved)
+            ordering.append(bind_placeholders(o_sql, len(params)))
+            params.extend(o_params)
+        return 'SORT %s' % ', '.join(ordering)
+
+    def get_limits(self, start: int) -> (List[str], List):
+        """Returns the LIMIT tokens and its params, the values are bound so they don't change the query shape.
+
+            LIMIT @p2          # [:10]
+            LIMIT @p2, @p3     # [20:30], the offset comes first.
+        """
+        low_mark, high_mark = self.query.low_mark, self.query.high_mark
+        if high_mark is None and not low_mark:
+            return [], []
+        if high_mark is None:
+            count = self.connection.ops.no_limit_value()
+        else:
+            count = high_mark - low_mark
+        if low_mark:
+            return ['LIMIT', bind_placeholders('%s, %s', start)], [low_mark, count]
+        return ['LIMIT', bind_placeholders('%s', start)], [count]
+
+    def get_query_shape(self, with_limits: bool, with_col_aliases: bool, subquery: bool):
+        """Returns a hashable description of everything that changes the AQL text of this query.
+
+        The values are not part of it, they are bind parameters. Returns None if the
+        query uses something that can't be described safely (joins, annotations,
+        extra, expressions), those are always compiled.
+        """
+        query = self.query
+        if (query.annotation_select or query.extra_select or query.extra_tables or query.select_related or
+                query.group_by is not None or query.distinct_fields or query.select_for_update or
+                getattr(query, 'traversal', None) is not None or
+                getattr(query, 'combinator', None) or len(query.tables) > 1):
+            return None
+        ordering = tuple(query.order_by) + tuple(query.extra_order_by)
+        if not all(isinstance(o, str) for o in ordering + tuple(query.get_meta().ordering)):
+            return None
+        try:
+            select = tuple((col.alias, col.target.column) for col in query.select)
+            where = where_shape(query.where)
+        except (AttributeError, UncacheableQuery):
+            return None
+        deferred_names, defer = query.deferred_loading
+        has_limits = with_limits and (query.low_mark > 0, query.high_mark is not None)
+        return (
+            self.using, self.__class__, query.model, where, select, query.default_cols,
+            frozenset(deferred_names), defer, ordering, query.default_ordering, query.standard_ordering,
+            query.distinct, has_limits, with_col_aliases, subquery,
+        )
+
+    def as_cached_sql(self, compiled, with_limits: bool) -> (str, tuple):
+        """Rebinds the values of this query to an already compiled AQL."""
+        self.select = compiled.select
+        self.klass_info = compiled.klass_info
+        self.annotation_col_map = compiled.annotation_col_map
+        self.col_count = compiled.col_count
+        self.where, self.having = self.query.where.split_having()
+        _, _, params = self.compile_filters()
+        if with_limits:
+            params.extend(self.get_limits(len(params))[1])
+        return compiled.sql, tuple(params)
+
+    def get_cursor_options(self) -> Dict:
+        """The batch_size and ttl of the server cursor, from the queryset or DATABASES['OPTIONS']."""
+        options = self.connection.driver_options
+        batch_size = getattr(self.query, 'batch_size', None) or options.get('BATCH_SIZE')
+        ttl = getattr(self.query, 'ttl', None) or options.get('TTL')
+        return {'batch_size': batch_size, 'ttl': ttl}
+
+    def execute_sql(self, result_type=MULTI, chunked_fetch=False):
         """
         Run the query against the database and returns the result(s). The
         return value is a single data item if result_type is SINGLE, or an
@@ -175,7 +612,11 @@ class SQLCompiler(compiler.SQLCompiler):
         ----
         # https://docs.arangodb.com/3.0/AQL/Fundamentals/BindParameters.html#bind-parameters
         ----
+        The params are sent as bind parameters, so the query string only depends on the
+        shape of the query and ArangoDB can reuse its plan.
 
+        For MULTI, the result is an iterator over the batches of the server cursor, the
+        next batch is requested only when the previous one was consumed.
         """
         if not result_type:
             result_type = NO_RESULTS
@@ -189,18 +630,28 @@ class SQLCompiler(compiler.SQLCompiler):
             else:
                 return
 
-        self.connection.ensure_connection()
-        cursor = self.connection.database.aql.execute(query=sql)
-        if result_type == CURSOR:
+        if result_type == MULTI and getattr(self.query, 'fetched_batches', None) is not None:
+            # The batches were already received by the asyncio path (see AQLQuerySet.__aiter__).
+            return iter(self.query.fetched_batches)
 
-            # FIXME: For now, we need to return a fake cursor. A more elegant solution wold be to reimplement a compliant cursor.
-            # FIXME: Or, we could move this to the SQLDeleteQuery...
-            cursor.rowcount = len(cursor._data['result'])
-            return cursor
+        if chunked_fetch:
+            cursor = self.connection.chunked_cursor()
+        else:
+            cursor = self.connection.cursor()
+        try:
+            cursor.set_options(**self.get_cursor_options())
+            cursor.execute(sql, params)
+        except Exception:
+            cursor.close()
+            raise
 
+        if result_type == CURSOR:
+            # Caller didn't specify a result_type, so just give them back the
+            # cursor to process (and close).
+            return cursor
         if result_type == SINGLE:
             try:
-                return cursor.next()
+                return cursor.fetchone()
             finally:
                 # done with the cursor
                 cursor.close()
@@ -208,14 +659,9 @@ class SQLCompiler(compiler.SQLCompiler):
             cursor.close()
             return
 
-        # TODO: Fazer a relação do cursor com o batch (quantos elementos são pegos por vez).
-        # result = cursor_iter(
-        #     cursor, self.connection.features.empty_fetchmany_value,
-        #     self.col_count
-        # )
-        result = cursor.batch()
+        result = cursor_iter(cursor)
 
-        if not self.connection.features.can_use_chunked_reads:
+        if not chunked_fetch and not self.connection.features.can_use_chunked_reads:
             try:
                 # If we are using non-chunked reads, we return the same data
                 # structure as normally, but ensure it is all read into memory
@@ -226,66 +672,144 @@ class SQLCompiler(compiler.SQLCompiler):
                 cursor.close()
         return result
 
-    def _make_result(self, entity, fields):
-        """
-        Decodes values for the given fields from the database entity.
+    async def aexecute_sql(self, result_type=MULTI):
+        """The asyncio version of execute_sql(), the query goes through DatabaseWrapper.async_cursor().
 
-        The entity is assumed to be a dict using field database column
-        names as keys. Decodes values using `value_from_db` as well as
-        the standard `convert_values`.
+        For MULTI, the result is an async iterator over the batches of the server cursor.
         """
-        result = []
-        for field in fields:
-            value = entity.get(field.target.column, None)
-            result.append(value)
-        return result
+        if not result_type:
+            result_type = NO_RESULTS
+        try:
+            sql, params = self.as_sql()
+            if not sql:
+                raise EmptyResultSet
+        except EmptyResultSet:
+            if result_type == MULTI:
+                return no_batches()
+            else:
+                return
+
+        cursor = self.connection.async_cursor()
+        cursor.set_options(**self.get_cursor_options())
+        profiled = is_profiled(self.connection)
+        start = time.monotonic()
+        try:
+            await cursor.execute(sql, params)
+        except Exception:
+            await cursor.close()
+            raise
+        finally:
+            if profiled:
+                record_query(self.connection, sql, params, cursor, time.monotonic() - start)
+
+        if result_type == CURSOR:
+            return cursor
+        if result_type == SINGLE:
+            try:
+                return await cursor.fetchone()
+            finally:
+                await cursor.close()
+        if result_type == NO_RESULTS:
+            await cursor.close()
+            return
+        return async_cursor_iter(cursor)
+
+    def get_batch_decoder(self):
+        """Returns the function that decodes a batch of rows, it's built once per query.
 
-    def results_iter(self, results=None):
-        # Results are dictionaries and we can't trust the order of the fields. This part deal with that.
+        Rows are arrays in the order of the select (see get_projection_sql), the columns
+        added to the projection for the ordering are cut by an itemgetter. The converter
+        chains of the columns are bound in advance, a batch without converters is
+        returned as is.
+        """
+        col_count = self.col_count
+        fields = [s[0] for s in self.select[0:col_count]]
+        chains = [(pos, tuple(convs), expression) for pos, (convs, expression)
+                  in sorted(self.get_converters(fields).items())]
+        cut = operator.itemgetter(slice(0, col_count))
+        connection, context = self.connection, self.query.context
+
+        def convert(row):
+            for pos, convs, expression in chains:
+                value = row[pos]
+                for converter in convs:
+                    value = converter(value, expression, connection, context)
+                row[pos] = value
+            return row
+
+        def decode(batch: List) -> List:
+            if batch and isinstance(batch[0], list) and len(batch[0]) > col_count:
+                batch = [cut(row) for row in batch]
+            if chains:
+                batch = [convert(list(row)) for row in batch]
+            return batch
+        return decode
+
+    def results_batches(self, results=None, chunked_fetch=False) -> Iterator[List]:
+        """Yields the decoded rows one batch at a time, as they come from the server."""
         if results is None:
-            results = self.execute_sql(MULTI)
-        fields = [s[0] for s in self.select[0:self.col_count]]
-        new_result = []
-        for item in results:
-            new_result.append(self._make_result(item, fields))
+            results = self.execute_sql(MULTI, chunked_fetch=chunked_fetch)
+        decode = self.get_batch_decoder()
+        for batch in results:
+            yield decode(batch)
 
-        # Now we return to the default django execution.
-        converters = self.get_converters(fields)
-        for row in new_result:
-            if converters:
-                row = self.apply_converters(row, converters)
-            yield row
+    def results_iter(self, results=None, chunked_fetch=False):
+        # Only one batch is kept in memory, rows are yielded while the batches are consumed.
+        for batch in self.results_batches(results, chunked_fetch):
+            yield from batch
 
 
 class SQLInsertCompiler(SQLCompiler, compiler.SQLInsertCompiler):
     return_id = True
 
+    # Policies for documents whose _key already exists, see AQLQuerySet.bulk_create.
+    on_duplicate_policies = ('error', 'update', 'replace', 'ignore')
+
     def execute_sql(self, return_id=True):
-        # Implemented in order to use the universal execute SQL.
-        ids = super().execute_sql(MULTI)
+        """Inserts the documents through the document API instead of an AQL query.
+
+        The documents go in the request body, so the server doesn't have to parse them
+        as a query. The keys are returned in the order of the objects. If an
+        `on_duplicate` policy is set in the query and all documents have a _key, the
+        bulk import API is used instead.
+
+        The import is complete or nothing is imported (halt_on_error). The document API
+        inserts each document on its own: if some fail, the others are inserted anyway,
+        the IntegrityError lists the errors and its inserted_keys are the keys of the
+        inserted documents.
+        """
+        documents = self.get_documents()
+        on_duplicate = getattr(self.query, 'on_duplicate', None) or 'error'
+        if on_duplicate not in self.on_duplicate_policies:
+            raise ValueError("on_duplicate must be one of: {}.".format(', '.join(self.on_duplicate_policies)))
+        self.connection.ensure_connection()
+        collection = self.connection.database.collection(self.query.get_meta().db_table)
+        with self.connection.wrap_database_errors, wrap_arango_errors():
+            if on_duplicate != 'error' and all('_key' in document for document in documents):
+                result = collection.import_bulk(documents, halt_on_error=True, on_duplicate=on_duplicate)
+                if result.get('errors'):
+                    raise Database.IntegrityError('; '.join(result.get('details', [])))
+                results = documents
+            else:
+                results = collection.insert_many(documents)
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            error = IntegrityError('; '.join(errors))
+            error.inserted_keys = [result['_key'] for result in results if not isinstance(result, Exception)]
+            raise error
+        ids = [result['_key'] for result in results]
         if len(ids) == 1:
             return ids[0]
         else:
             return ids
 
-    # noinspection PyMethodOverriding
-    def as_sql(self):
-        """Arango INSERT has the following format:
-
-            FOR item IN [{"nome":"B"}, {"nome":"C"}]
-                INSERT item IN Usuario
-                RETURN NEW._key
-
-        It's naturally bulk.
-        """
+    def get_documents(self) -> List[Dict]:
+        """Prepares the dictionaries for insertion, one per object."""
         opts = self.query.get_meta()
-        collection_name = opts.db_table
-        result = ['FOR', ITEM_ALIAS, 'IN']
         has_fields = bool(self.query.fields)
         fields = self.query.fields if has_fields else [opts.pk]
         documents = []
         if has_fields:
-            # Prepare the dictionary for insertion.
             for obj in self.query.objs:
                 document = {}
                 for field in fields:
@@ -293,16 +817,27 @@ class SQLInsertCompiler(SQLCompiler, compiler.SQLInsertCompiler):
                 documents.append(document)
         else:
             # An empty object.
-            documents.append('{}')
-        # Complete the query statement.
-        result.append(json.dumps(documents))
+            documents.append({})
+        return documents
+
+    # noinspection PyMethodOverriding
+    def as_sql(self):
+        """Arango INSERT has the following format:
+
+            FOR item IN @p0
+                INSERT item IN Usuario
+                RETURN NEW._key
+
+        It's naturally bulk. The documents are sent as a bind parameter
+        ([{"nome":"B"}, {"nome":"C"}]), not in the query text.
+        execute_sql() doesn't use it, the document API is faster.
+        """
+        collection_name = self.query.get_meta().db_table
+        result = ['FOR', ITEM_ALIAS, 'IN', bind_placeholders('%s')]
         result.extend(('INSERT', ITEM_ALIAS, 'IN', collection_name, 'RETURN NEW._key'))
-        # All inserts return ids, for this on the class because I don't know if Django uses it.
-        # self.return_id = True
-        # Empty params in this case.
         result = " ".join(result)
 
-        return result, ()
+        return result, (self.get_documents(),)
 
 
 class SQLDeleteCompiler(SQLCompiler):
@@ -329,11 +864,133 @@ class SQLDeleteCompiler(SQLCompiler):
         where, w_params = self.compile(self.query.where)
 
         if where:
-            # AragoDb use square braquets for lists.
-            where = where.replace("(%s)", "[%s]")
             result.append('FILTER')
-            result.append(where % tuple(w_params))
+            result.append(bind_placeholders(where))
+        # No RETURN, the rowcount comes from the server stats and no cursor is left open.
         result.extend(('REMOVE', ITEM_ALIAS, 'IN', collection_name))
-        result.extend(('RETURN', 'OLD._key'))
         return ' '.join(result), tuple(w_params)
 
+
+class SQLUpdateCompiler(SQLCompiler, compiler.SQLUpdateCompiler):
+    # noinspection PyMethodOverriding
+    def as_sql(self):
+        """
+        Creates the SQL for this query. Returns the SQL string and list of
+        parameters.
+
+        FOR item IN Person
+            FILTER item.name == @p0
+            UPDATE item WITH {age: item.age + @p1} IN Person
+
+        There is no RETURN, the number of updated documents comes from the server stats.
+        """
+        self.pre_sql_setup()
+        if not self.query.values:
+            return '', ()
+        collection_name = self.query.get_meta().db_table
+        result = ['FOR', ITEM_ALIAS, 'IN', collection_name]
+        params = []
+        where, w_params = self.compile(self.query.where)
+        if where:
+            result.append('FILTER')
+            result.append(bind_placeholders(where))
+            params.extend(w_params)
+
+        values = []
+        for field, model, val in self.query.values:
+            if hasattr(val, 'resolve_expression'):
+                val = val.resolve_expression(self.query, allow_joins=False, for_save=True)
+                if val.contains_aggregate:
+                    raise FieldError("Aggregate functions are not allowed in this query")
+            elif hasattr(val, 'prepare_database_save'):
+                if field.remote_field:
+                    val = field.get_db_prep_save(val.prepare_database_save(field), connection=self.connection)
+                else:
+                    raise TypeError(
+                        "Tried to update field %s with a model instance, %r. "
+                        "Use a value compatible with %s." % (field, val, field.__class__.__name__))
+            else:
+                val = field.get_db_prep_save(val, connection=self.connection)
+
+            if hasattr(val, 'as_sql'):
+                v_sql, v_params = self.compile(val)
+            else:
+                # None is bound too, it becomes null.
+                v_sql, v_params = '%s', [val]
+            values.append('%s: %s' % (field.column, bind_placeholders(v_sql, len(params))))
+            params.extend(v_params)
+
+        result.extend(('UPDATE', ITEM_ALIAS, 'WITH', '{%s}' % ', '.join(values), 'IN', collection_name))
+        return ' '.join(result), tuple(params)
+
+    def execute_sql(self, result_type):
+        """
+        Execute the specified update. Returns the number of documents updated.
+
+        The fields of the parent models (multi-table inheritance) are updated by the related
+        updates, a statement for each parent collection. As in Django, the keys of the
+        documents are read first (see pre_sql_setup) and the number of documents is the
+        one of the first statement that was run.
+        """
+        cursor = super().execute_sql(result_type)
+        try:
+            rows = cursor.rowcount if cursor else 0
+            is_empty = cursor is None
+        finally:
+            if cursor:
+                cursor.close()
+        for query in self.query.get_related_updates():
+            aux_rows = query.get_compiler(self.using).execute_sql(result_type)
+            if is_empty and aux_rows:
+                rows = aux_rows
+                is_empty = False
+        return rows
+
+    def as_bulk_sql(self, objs, fields) -> (str, tuple):
+        """Updates the fields of many objects in a single statement, the documents are a bind parameter.
+
+        FOR item IN @p0
+            UPDATE item IN Person
+        """
+        opts = self.query.get_meta()
+        documents = []
+        for obj in objs:
+            document = {opts.pk.column: opts.pk.get_db_prep_value(obj.pk, self.connection)}
+            for field in fields:
+                document[field.column] = field.get_db_prep_save(getattr(obj, field.attname),
+                                                                connection=self.connection)
+            documents.append(document)
+        result = ['FOR', ITEM_ALIAS, 'IN', bind_placeholders('%s'), 'UPDATE', ITEM_ALIAS, 'IN', opts.db_table]
+        return ' '.join(result), (documents,)
+
+    def execute_bulk_sql(self, objs, fields, batch_size: int = None) -> int:
+        """Runs as_bulk_sql() for each batch of objects, returns the number of updated documents."""
+        batch_size = batch_size or self.connection.ops.bulk_batch_size(fields, objs)
+        rows = 0
+        for start in range(0, len(objs), batch_size):
+            sql, params = self.as_bulk_sql(objs[start:start + batch_size], fields)
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows += cursor.rowcount
+        return rows
+
+
+class SQLAggregateCompiler(SQLCompiler):
+    # noinspection PyMethodOverriding
+    def as_sql(self):
+        """
+        Aggregates the results of a subquery, used by count() and aggregate() on sliced
+        or distinct querysets:
+
+            LET subquery = (FOR item IN Person ... LIMIT @p0 RETURN {"_key": item._key})
+            FOR item IN subquery
+                COLLECT WITH COUNT INTO a0
+                RETURN [a0]
+
+        The params of the subquery come first.
+        """
+        params = list(self.query.sub_params)
+        aggregation_sql, a_params = self.get_aggregation_sql(len(params))
+        self.col_count = len(self.query.annotation_select)
+        sql = 'LET subquery = (%s) FOR %s IN subquery %s' % (self.query.subquery, ITEM_ALIAS, aggregation_sql)
+        return sql, tuple(params + a_params)
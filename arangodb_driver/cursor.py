@@ -1,3 +1,270 @@
 # Pablo Carreira - 16/10/16
+"""DB-API like layer over the python-arango cursors.
 
+This module also defines the PEP-249 exceptions, it's used as the `Database`
+module of the DatabaseWrapper so Django can translate them into django.db errors.
+"""
+import json
+import re
+from contextlib import contextmanager
+from typing import Mapping, List, Iterator, Optional, Callable
 
+from arango.exceptions import ArangoError
+from requests.exceptions import RequestException
+
+from arangodb_driver.defines import BIND_VAR_PREFIX
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+# https://docs.arangodb.com/3.0/Manual/Appendix/ErrorCodes.html
+INTEGRITY_ERROR_CODES = {
+    1200,  # Conflict (revision mismatch).
+    1210,  # Unique constraint violated.
+}
+PROGRAMMING_ERROR_CODES = {
+    1203,  # Collection or view not found.
+    1501,  # Query parse error.
+    1510,  # Collection used in query not found.
+    1551, 1552, 1553,  # Bind parameters missing, undeclared or of the wrong type.
+}
+
+
+def database_error(error_code: int, message: str) -> DatabaseError:
+    """The PEP-249 exception for an ArangoDB error number."""
+    if error_code in INTEGRITY_ERROR_CODES:
+        return IntegrityError(message)
+    if error_code in PROGRAMMING_ERROR_CODES:
+        return ProgrammingError(message)
+    return DatabaseError(message)
+
+
+@contextmanager
+def wrap_arango_errors():
+    """Re-raises python-arango and connection errors as PEP-249 exceptions."""
+    try:
+        yield
+    except ArangoError as error:
+        raise database_error(error.error_code, str(error)) from error
+    except RequestException as error:
+        raise OperationalError(str(error)) from error
+
+
+# String literals, quoted names and comments, where a keyword is not an operation.
+_literal_re = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|`[^`]*`|\u00b4[^\u00b4]*\u00b4|//[^\n]*|/\*.*?\*/',
+                         re.DOTALL)
+# The AQL keywords are case insensitive, item.update is an attribute.
+_write_re = re.compile(r'(?<![.\w])(INSERT|UPDATE|REPLACE|REMOVE|UPSERT)\b', re.IGNORECASE)
+
+
+def is_read_only(aql: str) -> bool:
+    """True if the query has no data modification operation, it's safe to run it again."""
+    return _write_re.search(_literal_re.sub(' ', aql)) is None
+
+
+def bind_vars(params) -> Optional[Mapping]:
+    """Transform the positional params of a query into the bind_vars dict used by ArangoDB.
+
+    A mapping is used as is, the n-th positional param is bound to @p<n>.
+    """
+    if params is None or isinstance(params, Mapping):
+        return params
+    return {'%s%d' % (BIND_VAR_PREFIX, idx): value for idx, value in enumerate(params)}
+
+
+_bind_var_re = re.compile(r'(?<![@\w])@(\w+)')
+
+
+def interpolate(aql: str, params) -> str:
+    """The query with its bind variables replaced by their JSON values, to be read (not run).
+
+    Values that JSON can't represent are shown as strings.
+    """
+    variables = bind_vars(params) or {}
+
+    def replace(match):
+        name = match.group(1)
+        if name not in variables:
+            return match.group(0)
+        return json.dumps(variables[name], default=str)
+    return _bind_var_re.sub(replace, aql)
+
+
+class ArangoCursor(object):
+    """A PEP-249 like cursor over an AQL server cursor.
+
+    The documents are fetched from the server one batch at a time, only when
+    the rows already received were consumed. Rows are the values returned by
+    the query (usually dicts), not tuples.
+    """
+    arraysize = 1
+
+    def __init__(self, database, batch_size: int = None, ttl: int = None, reconnect: Callable = None,
+                 count: bool = False):
+        self.database = database
+        self.reconnect = reconnect
+        self.batch_size = batch_size
+        self.ttl = ttl
+        # The server only counts the results when asked, it may have to compute all of them.
+        self.count = count
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        # The statistics of the last query, as sent by the server (scannedFull, executionTime...).
+        self.stats = {}
+        self._cursor = None
+        self._buffer = []
+        self._position = 0
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def set_options(self, batch_size: int = None, ttl: int = None, count: bool = None):
+        """Change the batch_size, ttl and count for the next queries (None keeps the current value)."""
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if ttl is not None:
+            self.ttl = ttl
+        if count is not None:
+            self.count = count
+
+    def execute(self, aql: str, bind_vars_or_params=None):
+        """Executes the query, fetching only the first batch.
+
+        The params can be a mapping of bind variables or a sequence, bound as @p0, @p1...
+        If the connection was lost, a read only query is executed again after
+        reconnect() returns a new database.
+        """
+        self.close()
+        self.stats, self.rowcount = {}, -1
+        variables = bind_vars(bind_vars_or_params)
+        try:
+            self._execute(aql, variables)
+        except OperationalError:
+            if self.reconnect is None or not is_read_only(aql):
+                raise
+            self.database = self.reconnect()
+            self._execute(aql, variables)
+        self._buffer = self._cursor.batch()
+        self._position = 0
+        self.stats = self._cursor._data.get('extra', {}).get('stats') or {}
+        self.rowcount = self._get_rowcount()
+
+    def _execute(self, aql: str, variables: Optional[Mapping]):
+        with wrap_arango_errors():
+            self._cursor = self.database.aql.execute(
+                query=aql, bind_vars=variables, count=self.count, batch_size=self.batch_size, ttl=self.ttl)
+
+    def _get_rowcount(self) -> int:
+        """Modified documents for data modification queries, or the number of results.
+
+        Without count the number of results is only known when they fit in the first batch.
+        """
+        if self.stats.get('writesExecuted'):
+            return self.stats['writesExecuted']
+        count = self._cursor.count()
+        if count is None:
+            return -1 if self._cursor.has_more() else len(self._buffer)
+        return count
+
+    def _fetch_next_batch(self) -> bool:
+        """Replaces the buffer with the next batch from the server, returns False when there is none."""
+        if self._cursor is None:
+            raise ProgrammingError("execute() must be called before fetching rows.")
+        if not self._cursor.has_more():
+            self._buffer, self._position = [], 0
+            return False
+        # python-arango requests the next batch when the current one is empty. The buffer
+        # may already belong to the consumer, so it's detached instead of cleared.
+        self._cursor._data['result'] = []
+        with wrap_arango_errors():
+            try:
+                first = self._cursor.next()
+            except (StopIteration, IndexError):
+                # The server sent an empty batch.
+                first = None
+        batch = self._cursor.batch()
+        if first is not None:
+            batch.insert(0, first)
+        self._buffer, self._position = batch, 0
+        return bool(batch) or self._cursor.has_more()
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: int = None) -> List:
+        size = size or self.arraysize
+        rows = []
+        while len(rows) < size:
+            if self._position >= len(self._buffer) and not self._fetch_next_batch():
+                break
+            end = self._position + size - len(rows)
+            rows.extend(self._buffer[self._position:end])
+            self._position = min(end, len(self._buffer))
+        return rows
+
+    def fetchall(self) -> List:
+        return [row for batch in self.batches() for row in batch]
+
+    def batches(self) -> Iterator[List]:
+        """Yields the remaining rows as they come from the server, one batch at a time."""
+        if self._cursor is None:
+            raise ProgrammingError("execute() must be called before fetching rows.")
+        while True:
+            if self._position < len(self._buffer):
+                batch = self._buffer[self._position:] if self._position else self._buffer
+                # The consumer owns the batch now.
+                self._buffer, self._position = [], 0
+                yield batch
+            if not self._fetch_next_batch():
+                return
+
+    def close(self):
+        """Deletes the server cursor if it still has results, instead of waiting for its ttl."""
+        cursor, self._cursor = self._cursor, None
+        self._buffer, self._position = [], 0
+        if cursor is not None and cursor.has_more():
+            with wrap_arango_errors():
+                cursor.close(ignore_missing=True)
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def setoutputsize(self, size, column=None):
+        pass
@@ -1,3 +1,47 @@
 # Pablo Carreira - 15/10/16
 
-ITEM_ALIAS = 'item'  # Alias for each item in the 'FOR ITEM_ALIAS IN'..
\ No newline at end of file
+ITEM_ALIAS = 'item'  # Alias for each item in the 'FOR ITEM_ALIAS IN'..
+EDGE_ALIAS = 'edge'  # Alias of the edge in a traversal: 'FOR ITEM_ALIAS, EDGE_ALIAS, PATH_ALIAS IN'..
+PATH_ALIAS = 'path'  # Alias of the path in a traversal.
+JOIN_ALIAS_PREFIX = 'rel'  # Joined documents are 'LET rel1 = DOCUMENT(..)', 'LET rel2 = ..', see select_related.
+START_ALIAS = 'start'  # Alias of each start vertex of a traversal from many vertices: 'FOR START_ALIAS IN'..
+EDGE_MODEL_TYPE = 'arangodb_edge'  # model_type of the EdgeModels, their collections are edge collections.
+BIND_VAR_PREFIX = 'p'  # Bind parameters are named @p0, @p1... in the order of the params.
+QUERY_CACHE_SIZE = 512  # Max number of compiled query shapes kept by the compiler.
+
+# Keys of DATABASES['OPTIONS'] used by the driver itself, the others are passed to ArangoClient.
+DRIVER_OPTIONS = (
+    'BATCH_SIZE',  # Documents per round trip of the server cursors.
+    'TTL',  # Seconds the server keeps an idle cursor alive.
+    'COUNT',  # Ask the server for the number of results of each query (the rowcount of the cursors).
+    'BULK_BATCH_SIZE',  # Documents per request in bulk_create.
+    'JSON_CODEC',  # Codec of the request and response bodies: 'json', 'orjson' or 'msgspec'.
+    'POOL_SIZE',  # Idle clients kept by the process for each server, user and database (0 disables the pool).
+    'POOL_MAX_IDLE',  # Seconds an idle client is kept in the pool.
+    'POOL_CHECK_AFTER',  # Clients idle for more seconds than this are verified before being reused.
+    'HEALTH_CHECK_INTERVAL',  # Seconds between the verifications of the server by ensure_connection.
+    'LOAD_BALANCING',  # Strategy used with DATABASES['HOSTS']: 'round_robin', 'random' or 'least_outstanding'.
+    'BREAKER_THRESHOLD',  # Consecutive failures before a host of HOSTS is skipped.
+    'BREAKER_RESET',  # Seconds a failing host is skipped.
+    'ASYNC_POOL_SIZE',  # Max sockets of the aiohttp session of each event loop.
+    'SLOW_QUERY_THRESHOLD',  # Seconds after which a query is reported by the watchdog (None disables it).
+    'FULL_SCAN_RATIO',  # Queries that read more than this many documents without index per row are reported.
+    'FULL_SCAN_MIN',  # Documents read without index below which a query is never reported as a full scan.
+    'WATCHDOG_SAMPLE_RATE',  # Fraction (0 to 1) of the problematic queries that are reported.
+    'WATCHDOG_INTERVAL',  # Seconds between two reports of the same query.
+)
+COUNT = False  # Default of the COUNT option.
+BULK_BATCH_SIZE = 10000  # Default of the BULK_BATCH_SIZE option.
+JSON_CODEC = 'json'  # Default of the JSON_CODEC option.
+POOL_SIZE = 8  # Default of the POOL_SIZE option.
+POOL_MAX_IDLE = 300  # Default of the POOL_MAX_IDLE option.
+POOL_CHECK_AFTER = 30  # Default of the POOL_CHECK_AFTER option.
+HEALTH_CHECK_INTERVAL = 30  # Default of the HEALTH_CHECK_INTERVAL option.
+BREAKER_THRESHOLD = 3  # Default of the BREAKER_THRESHOLD option.
+BREAKER_RESET = 30  # Default of the BREAKER_RESET option.
+ASYNC_POOL_SIZE = 100  # Default of the ASYNC_POOL_SIZE option.
+FULL_SCAN_MIN = 1000  # Default of the FULL_SCAN_MIN option.
+WATCHDOG_SAMPLE_RATE = 1.0  # Default of the WATCHDOG_SAMPLE_RATE option.
+WATCHDOG_INTERVAL = 60  # Default of the WATCHDOG_INTERVAL option.
+WATCHDOG_MAX_KEYS = 1000  # Queries whose last report time is kept by the watchdog.
+MAX_PINNED_CURSORS = 1000  # Server cursors whose coordinator is kept by the load balancer, the least recently used go first.
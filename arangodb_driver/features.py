@@ -4,10 +4,8 @@ from django.db.backends.base.features import BaseDatabaseFeatures
 class DatabaseFeatures(BaseDatabaseFeatures):
     # Done:
     can_return_id_from_insert = True
-
-    # TODO: Implement those features.
-    # Check how cursors works and check compiler.execute_sql
+    # Server cursors are consumed one batch at a time (see cursor.ArangoCursor).
     can_use_chunked_reads = True
-    # Implement bulk insert.
+    # Bulk insert uses the document API (see compiler.SQLInsertCompiler).
     has_bulk_insert = True
     can_return_ids_from_bulk_insert = True
@@ -1,5 +1,5 @@
 from django.db.backends.base.introspection import BaseDatabaseIntrospection, TableInfo
-from typing import List
+from typing import List, Dict
 
 
 class DatabaseIntrospection(BaseDatabaseIntrospection):
@@ -9,4 +9,26 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         table_list = [TableInfo(c['name'], c['type']) for c in collections]
         return table_list
 
+    def get_constraints(self, cursor, table_name: str) -> Dict[str, Dict]:
+        """Returns the indexes of the collection by name, in the format of Django's introspection.
 
+        The type (persistent, hash, ttl, geo...), sparse and id (used to drop it) of
+        each index are also returned. Indexes without a name are returned by their id.
+        """
+        body = self.connection.api('get', '/_api/index', params={'collection': table_name})
+        constraints = {}
+        for index in body['indexes']:
+            fields = index.get('fields', [])
+            constraints[index.get('name') or index['id']] = {
+                'id': index['id'],
+                'columns': fields,
+                'orders': ['ASC'] * len(fields),
+                'primary_key': index['type'] == 'primary',
+                'unique': index.get('unique', False),
+                'sparse': index.get('sparse', False),
+                'foreign_key': None,
+                'check': False,
+                'index': True,
+                'type': index['type'],
+            }
+        return constraints
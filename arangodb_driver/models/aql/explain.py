@@ -0,0 +1,45 @@
+"""Execution plans of AQLQuerySet.explain().
+
+    plan = Person.objects.filter(name='Foo').explain()
+    plan.estimated_cost     # 12.5
+    plan.indexes            # [{'collection': 'sample_app_person', 'name': 'sample_app_person_name_..._idx', ...}]
+    plan.full_scans         # ['sample_app_person'] if the filter isn't covered by an index
+    plan.warnings           # the warnings of the server and one for each full collection scan
+
+plan.plan is the plan as returned by the server (POST /_api/explain).
+"""
+from collections import namedtuple
+from typing import List, Dict
+
+# Collections read without an index are read by EnumerateCollectionNodes.
+FULL_SCAN_NODE = 'EnumerateCollectionNode'
+INDEX_NODE = 'IndexNode'
+
+QueryPlan = namedtuple('QueryPlan', ['estimated_cost', 'estimated_items', 'indexes', 'full_scans', 'rules',
+                                     'warnings', 'cacheable', 'plan'])
+
+
+def get_plan_indexes(plan: Dict) -> List[Dict]:
+    """The indexes used by the plan, with the collection of each one."""
+    indexes = []
+    for node in plan.get('nodes', []):
+        if node['type'] == INDEX_NODE:
+            for index in node.get('indexes', []):
+                indexes.append({'collection': node.get('collection'), 'name': index.get('name') or index['id'],
+                                'type': index['type'], 'fields': index.get('fields', []),
+                                'unique': index.get('unique', False), 'sparse': index.get('sparse', False)})
+    return indexes
+
+
+def get_plan_full_scans(plan: Dict) -> List[str]:
+    """The collections read entirely by the plan."""
+    return [node['collection'] for node in plan.get('nodes', []) if node['type'] == FULL_SCAN_NODE]
+
+
+def parse_plan(plan: Dict, warnings: List[Dict] = (), cacheable: bool = None) -> QueryPlan:
+    """Builds the QueryPlan of a plan of the server, its warnings are given with the plan."""
+    full_scans = get_plan_full_scans(plan)
+    messages = [warning['message'] for warning in warnings]
+    messages.extend('Full scan of the collection "%s", no index is used.' % collection for collection in full_scans)
+    return QueryPlan(plan.get('estimatedCost'), plan.get('estimatedNrItems'), get_plan_indexes(plan), full_scans,
+                     plan.get('rules', []), messages, cacheable, plan)
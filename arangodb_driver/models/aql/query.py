@@ -1,7 +1,16 @@
-from django.db.models import QuerySet
-from django.db.models.expressions import Col
+from django.db import connections, transaction
+from django.db.models import AutoField, QuerySet, Count
+from django.db.models.expressions import Col, Ref
 from django.db.models.query import ModelIterable
-from django.db.models.sql import Query
+from django.db.models.sql import Query, InsertQuery, UpdateQuery, AggregateQuery
+from django.db.models.sql.constants import MULTI, SINGLE
+from django.utils.functional import partition
+from arangodb_driver.aio import BatchFeed
+from arangodb_driver.cursor import bind_vars, interpolate
+from arangodb_driver.models.fields import EdgeField
+from .explain import parse_plan
+from .traversal import (Traversal, TraversalEdge, TraversalPath, DIRECTIONS, UNIQUE_VERTICES, document_id,
+                        collection_name)
 from .where import AQLWhere
 
 
@@ -11,11 +20,116 @@ from .where import AQLWhere
 
 
 
+def referenced_aliases(expression):
+    """Yields the aliases of the annotations an expression refers to."""
+    if isinstance(expression, Ref):
+        yield expression.refs
+    for source in expression.get_source_expressions():
+        if source is not None:
+            yield from referenced_aliases(source)
+
+
 class AQLQuery(Query):
     # compiler = 'AQLCompiler'
+
+    # Options of the server cursor, None uses the values from DATABASES['OPTIONS'].
+    batch_size = None
+    ttl = None
+    # Batches already received by the asyncio path, returned by execute_sql() instead of querying.
+    fetched_batches = None
+    # The graph traversal that visits the documents, instead of the collection (see AQLQuerySet.traverse).
+    traversal = None
+
     def __init__(self, model, where=AQLWhere):
         super().__init__(model, where)
 
+    def __str__(self):
+        """The AQL of the query with the values of its bind variables, see cursor.interpolate()."""
+        sql, params = self.sql_with_params()
+        return interpolate(sql, params)
+
+    def build_lookup(self, lookups, lhs, rhs):
+        # A lookup on the pk of a vertex (_from__pk, _from___key) is done on the _id stored in the
+        # edge, without a join: it's built on the EdgeField, whose lookups convert the keys to _ids.
+        if isinstance(lhs, Col) and isinstance(lhs.target, EdgeField) and lhs.output_field is not lhs.target:
+            lhs = Col(lhs.alias, lhs.target)
+        return super().build_lookup(lookups, lhs, rhs)
+
+    def clone(self, klass=None, memo=None, **kwargs):
+        kwargs.setdefault('batch_size', self.batch_size)
+        kwargs.setdefault('ttl', self.ttl)
+        kwargs.setdefault('traversal', self.traversal)
+        return super().clone(klass, memo, **kwargs)
+
+    def set_traversal(self, start, edge_models, direction: str, min_depth: int, max_depth: int, prune=None,
+                      unique_vertices: str = None, bfs: bool = False, graph: str = None):
+        """Makes the query read the vertices visited by a traversal, see AQLQuerySet.traverse()."""
+        if (edge_models is None) == (graph is None):
+            raise ValueError("A traversal follows either edge models or a graph.")
+        direction = direction.lower()
+        if direction not in DIRECTIONS:
+            raise ValueError("The direction must be one of: {}.".format(', '.join(DIRECTIONS)))
+        if not 0 <= min_depth <= max_depth:
+            raise ValueError("The depths must satisfy 0 <= min_depth <= max_depth.")
+        if unique_vertices is not None and unique_vertices not in UNIQUE_VERTICES:
+            raise ValueError("unique_vertices must be one of: {}.".format(', '.join(UNIQUE_VERTICES)))
+        if unique_vertices == 'global' and not bfs:
+            raise ValueError("unique_vertices='global' requires bfs=True.")
+        if edge_models is None:
+            edge_models = []
+        elif not isinstance(edge_models, (list, tuple)):
+            edge_models = [edge_models]
+        if prune is not None:
+            prune, _ = self._add_q(prune, self.used_aliases, allow_joins=False)
+        if isinstance(start, (list, tuple)):
+            start = tuple(document_id(vertex) for vertex in start)
+        else:
+            start = document_id(start)
+        self.traversal = Traversal(start, tuple(collection_name(edge) for edge in edge_models),
+                                   direction, int(min_depth), int(max_depth), prune, unique_vertices, bool(bfs),
+                                   graph)
+
+    def get_aggregation(self, using, added_aggregate_names):
+        """Removes the annotations the aggregates don't read before aggregating (count(), aggregate()).
+
+        Django aggregates a query with other annotations in a subquery grouped by pk,
+        the edge, path and start of a traversal and the expressions of annotate(x=F('age') + 1)
+        are not read by the aggregates, a filter on them compiles their expression.
+        """
+        referenced = set()
+        for alias in added_aggregate_names:
+            referenced.update(referenced_aliases(self.annotations[alias]))
+        removed = {alias for alias, annotation in self.annotations.items()
+                   if alias not in added_aggregate_names and alias not in referenced and
+                   (isinstance(annotation, TraversalEdge) or
+                    not (self.distinct or getattr(annotation, 'contains_aggregate', True)))}
+        if removed:
+            for alias in removed:
+                del self.annotations[alias]
+            mask = self.annotations if self.annotation_select_mask is None else self.annotation_select_mask
+            self.set_annotation_mask(set(mask) - removed)
+        return super().get_aggregation(using, added_aggregate_names)
+
+    def get_count_query(self, using) -> Query:
+        """Returns the query that counts the results of this one, as get_count() does without running it."""
+        obj = self.clone()
+        if obj.low_mark or obj.high_mark is not None or obj.distinct:
+            # The rows of a sliced or distinct query are counted by an outer query.
+            obj.select_for_update = False
+            obj.select_related = False
+            if not obj.distinct:
+                obj.clear_ordering(False)
+                obj.default_cols = False
+                obj.select = (self.model._meta.pk.get_col(obj.get_initial_alias()),)
+            query = AggregateQuery(self.model)
+            query.add_subquery(obj, using)
+        else:
+            query = obj
+            query.clear_select_clause()
+            query.clear_ordering(True)
+        query.add_annotation(Count('*'), alias='__count', is_summary=True)
+        return query
+
 
 class AQLQuerySet(QuerySet):
     # noinspection PyMissingConstructor
@@ -37,3 +151,191 @@ class AQLQuerySet(QuerySet):
     def __repr__(self):
         return "{} - Model: {}".format(self.__class__.__name__, self.model)
 
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        """Yields the results (model instances, values() dicts...) while the batches are received.
+
+        The iterable class of the queryset reads the batches of the server cursor as if
+        they came from execute_sql(), through a BatchFeed: the query is compiled and its
+        rows decoded by a single compiler. Each row is a result, so once the rows of a
+        batch were yielded the next batch is awaited.
+        """
+        if self._result_cache is not None:
+            for obj in self._result_cache:
+                yield obj
+            return
+        batches = await self.query.get_compiler(using=self.db).aexecute_sql(MULTI)
+        clone = self._clone()
+        feed = clone.query.fetched_batches = BatchFeed()
+        results = iter(clone._iterable_class(clone))
+        async for batch in batches:
+            feed.put(batch)
+            for _ in range(len(batch)):
+                yield next(results)
+
+    async def acount(self) -> int:
+        """The asyncio version of count()."""
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        query = self.query.get_count_query(self.db)
+        row = await query.get_compiler(using=self.db).aexecute_sql(SINGLE)
+        return row[0] if row and row[0] is not None else 0
+
+    async def aget(self, *args, **kwargs):
+        """The asyncio version of get()."""
+        clone = self.filter(*args, **kwargs)
+        if self.query.can_filter() and not self.query.distinct_fields:
+            clone = clone.order_by()
+        results = [obj async for obj in clone]
+        num = len(results)
+        if num == 1:
+            return results[0]
+        if not num:
+            raise self.model.DoesNotExist(
+                "%s matching query does not exist." %
+                self.model._meta.object_name
+            )
+        raise self.model.MultipleObjectsReturned(
+            "get() returned more than one %s -- it returned %s!" %
+            (self.model._meta.object_name, num)
+        )
+
+    def traverse(self, start, edge_model=None, direction: str = 'outbound', min_depth: int = 1, max_depth: int = 1,
+                 prune=None, unique_vertices: str = None, bfs: bool = False, edges: bool = False,
+                 paths: bool = False, graph: str = None) -> 'AQLQuerySet':
+        """Returns the documents of this model reached from start through the edges, with a single query.
+
+        start is a model instance or a document _id (or a list of them), edge_model an EdgeModel (or a list of
+        them), or graph the name of a named graph whose edges are followed (see EdgeModel.graph_name),
+        and direction 'outbound', 'inbound' or 'any'. prune is a Q object on the
+        vertices, the traversal doesn't go further than the vertices that match it.
+        unique_vertices ('none', 'path' or 'global') and bfs are the OPTIONS of the traversal.
+
+        With edges each result has the edge that reached it as .edge, with paths the
+        vertices and edges from start as .path, both as model instances. The filters,
+        ordering and slices of the queryset apply to the visited vertices:
+
+            Group.objects.traverse(person, Belongs, max_depth=2).filter(name__startswith='Rock')
+        """
+        assert self.query.can_filter(), "Cannot traverse once a slice has been taken."
+        clone = self._clone()
+        clone.query.set_traversal(start, edge_model, direction, min_depth, max_depth, prune, unique_vertices, bfs,
+                                  graph)
+        if edges:
+            clone.query.add_annotation(TraversalEdge(), 'edge')
+        if paths:
+            clone.query.add_annotation(TraversalPath(), 'path')
+        return clone
+
+    def explain(self, all_plans: bool = False, optimizer_rules=None, max_plans: int = None):
+        """Returns the execution plan chosen by the server for the query, without running it.
+
+        The QueryPlan has the estimated cost, the indexes used and the collections read
+        without an index (see models.aql.explain). With all_plans a list of the plans
+        considered by the optimizer is returned. optimizer_rules enables or disables rules
+        of the optimizer, as ['-all', '+use-indexes'].
+        """
+        sql, params = self.query.get_compiler(using=self.db).as_sql()
+        options = {'allPlans': all_plans}
+        if optimizer_rules:
+            options['optimizer'] = {'rules': list(optimizer_rules)}
+        if max_plans is not None:
+            options['maxNumberOfPlans'] = max_plans
+        body = connections[self.db].api('post', '/_api/explain',
+                                        {'query': sql, 'bindVars': bind_vars(params) or {}, 'options': options})
+        warnings = body.get('warnings', [])
+        if all_plans:
+            return [parse_plan(plan, warnings) for plan in body['plans']]
+        return parse_plan(body['plan'], warnings, body.get('cacheable'))
+
+    def batch_size(self, size: int, ttl: int = None) -> 'AQLQuerySet':
+        """Returns a new queryset that fetches `size` documents per round trip.
+
+        The ttl (in seconds) is how long the server keeps the cursor alive between two batches.
+        """
+        clone = self._clone()
+        clone.query.batch_size = size
+        if ttl is not None:
+            clone.query.ttl = ttl
+        return clone
+
+    def bulk_create(self, objs, batch_size=None, on_duplicate=None):
+        """Inserts the objects with one request per batch, see Django's bulk_create().
+
+        The batch_size defaults to DatabaseOperations.bulk_batch_size(). on_duplicate is
+        what to do when a _key already exists: 'error' (the default, raises
+        IntegrityError), 'update', 'replace' or 'ignore'. It only applies to objects
+        that have a pk.
+
+        It isn't atomic: the batches sent before a failing one stay inserted and, without
+        on_duplicate, so do the other documents of the failing batch (their keys are the
+        inserted_keys of the IntegrityError, see SQLInsertCompiler.execute_sql).
+        """
+        # As Django's, with the on_duplicate policy given to the inserts of the objects with a pk.
+        assert batch_size is None or batch_size > 0
+        for parent in self.model._meta.get_parent_list():
+            if parent._meta.concrete_model is not self.model._meta.concrete_model:
+                raise ValueError("Can't bulk create a multi-table inherited model")
+        if not objs:
+            return objs
+        self._for_write = True
+        fields = self.model._meta.concrete_fields
+        objs = list(objs)
+        self._populate_pk_values(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs_with_pk, objs_without_pk = partition(lambda o: o.pk is None, objs)
+            if objs_with_pk:
+                self._batched_insert(objs_with_pk, fields, batch_size, on_duplicate=on_duplicate)
+            if objs_without_pk:
+                fields = [f for f in fields if not isinstance(f, AutoField)]
+                ids = self._batched_insert(objs_without_pk, fields, batch_size)
+                for obj_without_pk, pk in zip(objs_without_pk, ids):
+                    obj_without_pk.pk = pk
+                    obj_without_pk._state.adding = False
+                    obj_without_pk._state.db = self.db
+        return objs
+
+    def _batched_insert(self, objs, fields, batch_size, on_duplicate=None):
+        """Inserts the objects one batch at a time, returns the keys of the documents."""
+        if not objs:
+            return
+        ops = connections[self.db].ops
+        batch_size = (batch_size or max(ops.bulk_batch_size(fields, objs), 1))
+        inserted_ids = []
+        for item in [objs[i:i + batch_size] for i in range(0, len(objs), batch_size)]:
+            inserted_id = self._insert(item, fields=fields, using=self.db, return_id=True, on_duplicate=on_duplicate)
+            if isinstance(inserted_id, list):
+                inserted_ids.extend(inserted_id)
+            else:
+                inserted_ids.append(inserted_id)
+        return inserted_ids
+
+    def _insert(self, objs, fields, return_id=False, raw=False, using=None, on_duplicate=None):
+        # Overridden in order to pass the on_duplicate policy to the compiler.
+        self._for_write = True
+        if using is None:
+            using = self.db
+        query = InsertQuery(self.model)
+        query.on_duplicate = on_duplicate
+        query.insert_values(fields, objs, raw=raw)
+        return query.get_compiler(using=using).execute_sql(return_id)
+    _insert.alters_data = True
+    _insert.queryset_only = False
+
+    def bulk_update(self, objs, fields, batch_size=None) -> int:
+        """Saves the given fields of the objects, with a single query per batch.
+
+        The objects must have a pk. Returns the number of updated documents.
+        """
+        fields = [self.model._meta.get_field(name) for name in fields]
+        if any(field.primary_key for field in fields):
+            raise ValueError("bulk_update() cannot be used with primary key fields.")
+        objs = list(objs)
+        if not objs:
+            return 0
+        self._for_write = True
+        query = UpdateQuery(self.model)
+        return query.get_compiler(using=self.db).execute_bulk_sql(objs, fields, batch_size)
+    bulk_update.alters_data = True
@@ -0,0 +1,124 @@
+"""Graph traversals of AQLQuerySet.traverse().
+
+    Group.objects.traverse(person, Belongs, direction='outbound', max_depth=2)
+
+compiles to a single query, the FILTERs of the queryset apply to the visited vertices:
+
+    FOR item, edge, path IN 1..2 OUTBOUND @p0 sample_app_belongs
+        FILTER IS_SAME_COLLECTION("sample_app_group", item) RETURN [item._key, item.name]
+
+The edges of a named graph (see EdgeModel.graph_name) are all followed with graph=:
+
+    Group.objects.traverse(person, graph='sample_app', direction='any', max_depth=3)
+
+    FOR item, edge, path IN 1..3 ANY @p0 GRAPH @p1 FILTER IS_SAME_COLLECTION("sample_app_group", item) ...
+
+A traversal from many vertices (used by prefetch_related) visits them one after the other:
+
+    FOR start IN @p0 FOR item, edge, path IN 1..1 OUTBOUND start sample_app_belongs ...
+"""
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connections
+from django.db.models import Field
+from django.db.models.expressions import Expression
+
+from arangodb_driver.defines import EDGE_ALIAS, PATH_ALIAS, START_ALIAS
+
+DIRECTIONS = ('outbound', 'inbound', 'any')
+UNIQUE_VERTICES = ('none', 'path', 'global')
+
+# start is the _id of the first vertex (a tuple of them for many), prune a where node on the vertices (or None).
+# graph is the name of a named graph, the edge collections are empty then.
+Traversal = namedtuple('Traversal', ['start', 'edge_collections', 'direction', 'min_depth', 'max_depth',
+                                     'prune', 'unique_vertices', 'bfs', 'graph'])
+
+
+def document_id(obj) -> str:
+    """The _id of a model instance, strings are taken as _ids ('Collection/key')."""
+    if isinstance(obj, str):
+        if '/' not in obj:
+            raise ValueError("'%s' is not a document _id, it must be 'collection/key'." % obj)
+        return obj
+    if obj.pk is None:
+        raise ValueError("%r has no _key, it must be saved first." % obj)
+    return '%s/%s' % (obj._meta.db_table, obj.pk)
+
+
+def collection_name(model_or_name) -> str:
+    meta = getattr(model_or_name, '_meta', None)
+    return meta.db_table if meta is not None else model_or_name
+
+
+# The models of apps.get_models() by db_table, and the list they were read from.
+_collection_models = {'models': None, 'by_table': {}}
+
+
+def model_for_collection(name: str):
+    """The model stored in the collection, None if there is none.
+
+    apps.get_models() is cached by Django until the registry changes, the map is
+    rebuilt when it returns another list.
+    """
+    models = apps.get_models()
+    if _collection_models['models'] is not models:
+        _collection_models['by_table'] = {model._meta.db_table: model for model in reversed(models)}
+        _collection_models['models'] = models
+    return _collection_models['by_table'].get(name)
+
+
+def document_to_instance(document, using: str, model=None):
+    """Builds a model instance from a document, the model is found by the collection of its _id.
+
+    Documents of collections without a model are returned as they are.
+    """
+    if not isinstance(document, dict):
+        return document
+    if model is None:
+        model = model_for_collection(document.get('_id', '').split('/', 1)[0])
+        if model is None:
+            return document
+    connection = connections[using]
+    values = []
+    for field in model._meta.concrete_fields:
+        value = document.get(field.column)
+        if value is not None and hasattr(field, 'from_db_value'):
+            value = field.from_db_value(value, None, connection, {})
+        values.append(value)
+    return model.from_db(using, None, values)
+
+
+class TraversalEdge(Expression):
+    """The edge that reached each vertex, as an instance of its model (set as vertex.edge)."""
+    template = EDGE_ALIAS
+
+    def __init__(self):
+        super().__init__(output_field=Field())
+
+    def as_sql(self, compiler, connection):
+        return self.template, []
+
+    def convert_value(self, value, expression, connection, context):
+        return document_to_instance(value, connection.alias)
+
+
+class TraversalPath(TraversalEdge):
+    """The path to each vertex (set as vertex.path): {'vertices': [...], 'edges': [...]} of model instances."""
+    template = PATH_ALIAS
+
+    def convert_value(self, value, expression, connection, context):
+        if value is None:
+            return None
+        return {
+            'vertices': [document_to_instance(vertex, connection.alias) for vertex in value['vertices']],
+            'edges': [document_to_instance(edge, connection.alias) for edge in value['edges']],
+        }
+
+
+class TraversalStart(TraversalEdge):
+    """The _id of the vertex a traversal from many vertices started from."""
+    template = START_ALIAS
+
+    def convert_value(self, value, expression, connection, context):
+        return value
@@ -1,10 +1,7 @@
 # Pablo Carreira 2016
 from django.db import models
 
-
-def quote_string(value: str) -> str:
-    """Quote a string in order to compose an AQL query."""
-    return '"' + str(value) + '"'
+from .related import EdgeManyToManyDescriptor
 
 
 class IntegerField(models.IntegerField):
@@ -16,32 +13,96 @@ class AutoField(models.AutoField):
         if not prepared:
             value = self.get_prep_value(value)
             value = connection.ops.validate_autopk_value(value)
-        else:
-            value = quote_string(value)
+        # The _key is always a string in ArangoDB, it's sent as a bind parameter.
+        if value is not None:
+            value = str(value)
         return value
 
 
 class CharField(models.CharField):
-    def get_db_prep_value(self, value, connection, prepared: bool = False):
-        # We need to quote string fields.
-        # I don't know how prepared works, but the lookup sends True.
-        if prepared:
-            value = quote_string(value)
-        return value
+    # Values are sent as bind parameters, so no quoting is needed.
+    pass
+
+
+class EdgeField(models.ForeignKey):
+    """The vertex an edge points from or to, a foreign key stored as the _id of the vertex ('Person/1').
+
+    The attribute of the document is always _from or _to, the value in Python is the _key.
+    """
+    column_name = None
+
+    def __init__(self, to, on_delete=models.CASCADE, **kwargs):
+        kwargs['db_column'] = self.column_name
+        super().__init__(to, on_delete, **kwargs)
 
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['db_column']
+        return name, path, args, kwargs
 
-class EdgeField:
-    def __init__(self, other_model):
-        self.other_model = other_model
+    def to_document_id(self, value):
+        if value is None or '/' in value:
+            return value
+        return '%s/%s' % (self.remote_field.model._meta.db_table, value)
+
+    def get_db_prep_save(self, value, connection):
+        return self.to_document_id(super().get_db_prep_save(value, connection))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        return self.to_document_id(super().get_db_prep_value(value, connection, prepared))
+
+    def from_db_value(self, value, expression, connection, context):
+        if value is None:
+            return value
+        return value.split('/', 1)[-1]
 
 
 class FromField(EdgeField):
-    pass
+    column_name = '_from'
 
 
 class ToField(EdgeField):
-    pass
+    column_name = '_to'
 
 
 class ManyToMany(models.ManyToManyField):
-    pass
\ No newline at end of file
+    """A many-to-many relation whose links are documents of an edge collection, from this model to the other.
+
+    edge_model is the EdgeModel (or its name) of the collection, it's the intermediary
+    model of the relation (as through), so Django doesn't create one. Without it, the
+    collection of the intermediary model created by Django is used, as an edge collection.
+    """
+
+    def __init__(self, to, edge_model=None, **kwargs):
+        if edge_model is not None:
+            if kwargs.get('through') is not None:
+                raise ValueError('ManyToMany takes either edge_model or through, not both.')
+            kwargs['through'] = edge_model
+        super().__init__(to, **kwargs)
+
+    @property
+    def edge_model(self):
+        """The intermediary model given as edge_model (or through), None if Django created it."""
+        through = self.remote_field.through
+        if through is None or (not isinstance(through, str) and through._meta.auto_created):
+            return None
+        return through
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if 'through' in kwargs:
+            kwargs['edge_model'] = kwargs.pop('through')
+        return name, path, args, kwargs
+
+    @property
+    def edge_collection(self) -> str:
+        return self.m2m_db_table()
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.name, EdgeManyToManyDescriptor(self.remote_field, reverse=False))
+
+    def contribute_to_related_class(self, cls, related):
+        super().contribute_to_related_class(cls, related)
+        if not self.remote_field.is_hidden() and not related.related_model._meta.swapped:
+            setattr(cls, related.get_accessor_name(), EdgeManyToManyDescriptor(self.remote_field, reverse=True))
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""ArangoDB index types for Meta.indexes, created by the DatabaseSchemaEditor.
+
+    class Meta:
+        indexes = [
+            PersistentIndex(fields=['name', 'age']),
+            TTLIndex(fields=['expires_at'], expire_after=0),
+            GeoIndex(fields=['location'], geo_json=True),
+        ]
+
+Django's models.Index is created as a persistent index.
+"""
+from django.db.models import Index
+
+
+class ArangoIndex(Index):
+    """Base of the ArangoDB indexes, index_type is the type sent to the server."""
+    index_type = 'persistent'
+    suffix = 'pix'
+
+    def __init__(self, fields=[], name=None, unique=False, sparse=False):
+        super().__init__(fields=fields, name=name)
+        self.unique = unique
+        self.sparse = sparse
+
+    def get_index_options(self, model) -> dict:
+        """The body of the index creation request (POST /_api/index)."""
+        columns = [model._meta.get_field(field_name).column for field_name, _ in self.fields_orders]
+        options = {'type': self.index_type, 'fields': columns, 'name': self.name}
+        if self.unique:
+            options['unique'] = True
+        if self.sparse:
+            options['sparse'] = True
+        return options
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.unique:
+            kwargs['unique'] = True
+        if self.sparse:
+            kwargs['sparse'] = True
+        return path, args, kwargs
+
+
+class PersistentIndex(ArangoIndex):
+    pass
+
+
+class HashIndex(ArangoIndex):
+    index_type = 'hash'
+    suffix = 'hix'
+
+
+class SkiplistIndex(ArangoIndex):
+    index_type = 'skiplist'
+    suffix = 'six'
+
+
+class TTLIndex(ArangoIndex):
+    """Removes the documents expire_after seconds after the date of the field (a timestamp or ISO 8601 string)."""
+    index_type = 'ttl'
+    suffix = 'tix'
+
+    def __init__(self, fields=[], name=None, expire_after=0):
+        if len(fields) != 1:
+            raise ValueError('A TTL index must have a single field.')
+        super().__init__(fields=fields, name=name, sparse=False)
+        self.expire_after = expire_after
+
+    def get_index_options(self, model) -> dict:
+        options = super().get_index_options(model)
+        options['expireAfter'] = self.expire_after
+        return options
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs['expire_after'] = self.expire_after
+        return path, args, kwargs
+
+
+class GeoIndex(ArangoIndex):
+    """An index of a [latitude, longitude] field (or two fields), or of GeoJSON with geo_json."""
+    index_type = 'geo'
+    suffix = 'gix'
+
+    def __init__(self, fields=[], name=None, geo_json=False):
+        super().__init__(fields=fields, name=name)
+        self.geo_json = geo_json
+
+    def get_index_options(self, model) -> dict:
+        options = super().get_index_options(model)
+        if self.geo_json:
+            options['geoJson'] = True
+        return options
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.geo_json:
+            kwargs['geo_json'] = True
+        return path, args, kwargs
+
+
+def get_index_options(model, index) -> dict:
+    """The index creation request of an index of Meta.indexes, Django's Index is a persistent index."""
+    if isinstance(index, ArangoIndex):
+        return index.get_index_options(model)
+    columns = [model._meta.get_field(field_name).column for field_name, _ in index.fields_orders]
+    return {'type': 'persistent', 'fields': columns, 'name': index.name}
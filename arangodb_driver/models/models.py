@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, router, connections
+from django.db.models import signals
 from django.db.models.base import ModelBase
 
+from arangodb_driver.defines import EDGE_MODEL_TYPE
 from arangodb_driver.models.fields import AutoField
 from .arangodbmanager import ArangoDBManager
 
@@ -24,6 +26,33 @@ class DocumentModel(models.Model):
         abstract = True
         required_db_vendor = 'arangodb'
 
+    async def asave(self, using=None):
+        """The asyncio version of save(), the document is updated if it exists or inserted.
+
+        The pre_save and post_save signals are sent, as save() does.
+        """
+        cls = self.__class__
+        using = using or router.db_for_write(cls, instance=self)
+        connection = connections[using]
+        meta = cls._meta
+        signals.pre_save.send(sender=cls, instance=self, raw=False, using=using, update_fields=None)
+
+        document = {}
+        for field in meta.concrete_fields:
+            if field.primary_key:
+                continue
+            value = field.pre_save(self, self._state.adding)
+            document[field.column] = field.get_db_prep_save(value, connection=connection)
+        if self.pk is not None:
+            document['_key'] = str(self.pk)
+        result, created = await connection.async_connection().save_document(meta.db_table, document)
+        self.pk = result['_key']
+
+        self._state.db = using
+        self._state.adding = False
+        signals.post_save.send(sender=cls, instance=self, created=created, update_fields=None, raw=False,
+                               using=using)
+
 
 class VertexModel(DocumentModel):
     model_type = 'arangodb_node'
@@ -33,7 +62,13 @@ class VertexModel(DocumentModel):
 
 
 class EdgeModel(DocumentModel):
-    model_type = 'arangodb_edge'
+    """A document of an edge collection, its _from and _to are a FromField and a ToField.
+
+    The collection is part of the named graph graph_name (the app label if None), with
+    the models of its _from and _to as vertex collections.
+    """
+    model_type = EDGE_MODEL_TYPE
+    graph_name = None
 
     class Meta:
         abstract = True
@@ -0,0 +1,209 @@
+"""Descriptors and managers of the ManyToMany relations, stored as documents of an edge collection.
+
+    person.groups.all()          # FOR item, edge, path IN 1..1 OUTBOUND @p0 sample_app_belongs ...
+    person.groups.add(g1, g2)    # a single UPSERT of the two edges
+    group.person_set.all()       # the same traversal, INBOUND
+
+The edges go from the model that has the field to the related model. prefetch_related()
+reads the related documents of all instances with a single traversal from many vertices.
+"""
+import operator
+
+from django.db import connections, router
+from django.db.models import signals
+from django.db.models.fields.related_descriptors import ManyToManyDescriptor
+from django.utils.functional import cached_property
+
+from arangodb_driver.defines import ITEM_ALIAS
+from arangodb_driver.models.aql.traversal import TraversalStart
+
+
+class EdgeManyToManyDescriptor(ManyToManyDescriptor):
+    """The accessor of the edge related manager, on both sides of the relation."""
+
+    @cached_property
+    def related_manager_cls(self):
+        related_model = self.rel.related_model if self.reverse else self.rel.model
+        return create_edge_many_to_many_manager(related_model._default_manager.__class__, self.rel, self.reverse)
+
+
+def create_edge_many_to_many_manager(superclass, rel, reverse):
+    """Creates the manager of one side of the relation, it subclasses the default manager of the related model."""
+
+    class EdgeManyRelatedManager(superclass):
+        def __init__(self, instance=None):
+            super().__init__()
+            self.instance = instance
+            if not reverse:
+                self.model = rel.model
+                self.prefetch_cache_name = rel.field.name
+            else:
+                self.model = rel.related_model
+                self.prefetch_cache_name = rel.field.related_query_name()
+            self.field = rel.field
+            self.through = rel.through
+            self.reverse = reverse
+            self.direction = 'inbound' if reverse else 'outbound'
+            # The attribute of the edges that points to the instance, and the one that points to the others.
+            self.source_attr, self.target_attr = ('_to', '_from') if reverse else ('_from', '_to')
+            if instance.pk is None:
+                raise ValueError("%r instance needs to have a primary key value before "
+                                 "a many-to-many relationship can be used." %
+                                 instance.__class__.__name__)
+            self.source_id = '%s/%s' % (instance._meta.db_table, instance.pk)
+
+        def __call__(self, **kwargs):
+            manager = getattr(self.model, kwargs.pop('manager'))
+            manager_class = create_edge_many_to_many_manager(manager.__class__, rel, reverse)
+            return manager_class(instance=self.instance)
+        do_not_call_in_templates = True
+
+        def _apply_rel_filters(self, queryset):
+            """Restricts the queryset to the related documents, with a traversal of depth 1 from the instance."""
+            queryset._add_hints(instance=self.instance)
+            if self._db:
+                queryset = queryset.using(self._db)
+            return queryset.traverse(self.source_id, self.field.edge_collection, self.direction)
+
+        def get_queryset(self):
+            try:
+                return self.instance._prefetched_objects_cache[self.prefetch_cache_name]
+            except (AttributeError, KeyError):
+                return self._apply_rel_filters(super().get_queryset())
+
+        def _remove_prefetched_objects(self):
+            try:
+                self.instance._prefetched_objects_cache.pop(self.prefetch_cache_name)
+            except (AttributeError, KeyError):
+                pass  # nothing to clear from cache
+
+        def get_prefetch_queryset(self, instances, queryset=None):
+            """Reads the related documents of all instances with one traversal, see prefetch_related_objects().
+
+                FOR start IN @p0 FOR item, edge, path IN 1..1 OUTBOUND start Belongs ... RETURN [..., start]
+
+            Each document is given to the instance it was reached from.
+            """
+            if queryset is None:
+                queryset = super().get_queryset()
+            queryset._add_hints(instance=instances[0])
+            queryset = queryset.using(queryset._db or self._db)
+            starts = ['%s/%s' % (instance._meta.db_table, instance.pk) for instance in instances]
+            queryset = queryset.traverse(starts, self.field.edge_collection, self.direction)
+            queryset.query.add_annotation(TraversalStart(), '_prefetch_related_val')
+            return (
+                queryset,
+                operator.attrgetter('_prefetch_related_val'),
+                lambda instance: '%s/%s' % (instance._meta.db_table, instance.pk),
+                False,
+                self.prefetch_cache_name,
+            )
+
+        def get_target_ids(self, objs):
+            """Returns the _ids of the objects (instances or keys) and the set of their keys."""
+            ids, keys = [], set()
+            for obj in objs:
+                if isinstance(obj, self.model):
+                    if obj.pk is None:
+                        raise ValueError('Cannot add "%r": the value for field "%s" is None' %
+                                         (obj, self.model._meta.pk.name))
+                    key = str(obj.pk)
+                elif hasattr(obj, '_meta'):
+                    raise TypeError("'%s' instance expected, got %r" % (self.model._meta.object_name, obj))
+                else:
+                    key = str(obj)
+                if key not in keys:
+                    keys.add(key)
+                    ids.append('%s/%s' % (self.model._meta.db_table, key))
+            return ids, keys
+
+        def run(self, db: str, aql: str, params) -> int:
+            with connections[db].cursor() as cursor:
+                cursor.execute(aql, params)
+                return cursor.rowcount
+
+        def send_signal(self, action: str, keys, db: str):
+            signals.m2m_changed.send(sender=self.through, action=action, instance=self.instance,
+                                     reverse=self.reverse, model=self.model, pk_set=keys, using=db)
+
+        def add(self, *objs, through_defaults=None):
+            """Links the objects with a single statement, existing edges are kept as they are.
+
+                FOR item IN @p0 UPSERT {_from: item._from, _to: item._to} INSERT item UPDATE {} IN Belongs
+            """
+            db = router.db_for_write(self.through, instance=self.instance)
+            ids, keys = self.get_target_ids(objs)
+            if not ids:
+                return
+            self._remove_prefetched_objects()
+            self.send_signal('pre_add', keys, db)
+            edges = [dict(through_defaults or {}, **{self.source_attr: self.source_id, self.target_attr: target})
+                     for target in ids]
+            aql = 'FOR %(item)s IN @p0 UPSERT {_from: %(item)s._from, _to: %(item)s._to} ' \
+                  'INSERT %(item)s UPDATE {} IN %(collection)s'
+            self.run(db, aql % {'item': ITEM_ALIAS, 'collection': self.field.edge_collection}, [edges])
+            self.send_signal('post_add', keys, db)
+        add.alters_data = True
+
+        def remove(self, *objs):
+            """Removes the edges to the objects with a single statement."""
+            db = router.db_for_write(self.through, instance=self.instance)
+            ids, keys = self.get_target_ids(objs)
+            if not ids:
+                return
+            self._remove_prefetched_objects()
+            self.send_signal('pre_remove', keys, db)
+            aql = 'FOR %(item)s IN %(collection)s FILTER %(item)s.%(source)s == @p0 AND ' \
+                  '%(item)s.%(target)s IN @p1 REMOVE %(item)s IN %(collection)s'
+            self.run(db, aql % self.aql_names(), [self.source_id, ids])
+            self.send_signal('post_remove', keys, db)
+        remove.alters_data = True
+
+        def clear(self):
+            """Removes all edges of the instance with a single statement."""
+            db = router.db_for_write(self.through, instance=self.instance)
+            self._remove_prefetched_objects()
+            self.send_signal('pre_clear', None, db)
+            aql = 'FOR %(item)s IN %(collection)s FILTER %(item)s.%(source)s == @p0 REMOVE %(item)s IN %(collection)s'
+            self.run(db, aql % self.aql_names(), [self.source_id])
+            self.send_signal('post_clear', None, db)
+        clear.alters_data = True
+
+        def set(self, objs, clear=False, through_defaults=None):
+            """Makes the objects the only related ones, the edges to the others are removed.
+
+            The stale edges are removed by one statement and the missing ones inserted by
+            another (add), the current edges are not read first. A collection can't be
+            modified twice by the same AQL query.
+            """
+            objs = tuple(objs)
+            if clear:
+                self.clear()
+                self.add(*objs, through_defaults=through_defaults)
+                return
+            db = router.db_for_write(self.through, instance=self.instance)
+            ids, _ = self.get_target_ids(objs)
+            self._remove_prefetched_objects()
+            aql = 'FOR %(item)s IN %(collection)s FILTER %(item)s.%(source)s == @p0 AND ' \
+                  '%(item)s.%(target)s NOT IN @p1 REMOVE %(item)s IN %(collection)s RETURN OLD.%(target)s'
+            with connections[db].cursor() as cursor:
+                cursor.execute(aql % self.aql_names(), [self.source_id, ids])
+                removed = {target.split('/', 1)[1] for target in cursor.fetchall()}
+            if removed:
+                # The removed keys are only known once they were removed.
+                self.send_signal('post_remove', removed, db)
+            self.add(*objs, through_defaults=through_defaults)
+        set.alters_data = True
+
+        def create(self, through_defaults=None, **kwargs):
+            db = router.db_for_write(self.instance.__class__, instance=self.instance)
+            new_obj = super(EdgeManyRelatedManager, self.db_manager(db)).create(**kwargs)
+            self.add(new_obj, through_defaults=through_defaults)
+            return new_obj
+        create.alters_data = True
+
+        def aql_names(self):
+            return {'item': ITEM_ALIAS, 'collection': self.field.edge_collection,
+                    'source': self.source_attr, 'target': self.target_attr}
+
+    return EdgeManyRelatedManager
@@ -6,6 +6,9 @@ from django.conf import settings
 from django.db.backends.base.operations import BaseDatabaseOperations
 from typing import Iterable
 
+from arangodb_driver.cursor import interpolate
+from arangodb_driver.defines import BULK_BATCH_SIZE
+
 
 # TODO: Copy from django toolbox.
 # Incui as operações específicas de conversão de tipos. Explicando melhor,
@@ -50,6 +53,23 @@ class DatabaseOperations(BaseDatabaseOperations):
         return []
 
 
+    def last_executed_query(self, cursor, sql, params) -> str:
+        """The query with the values of its bind variables, see cursor.interpolate()."""
+        return interpolate(sql, params)
+
+    def bulk_batch_size(self, fields, objs) -> int:
+        """Number of documents sent per request by bulk_create (DATABASES['OPTIONS']['BULK_BATCH_SIZE'])."""
+        return self.connection.driver_options.get('BULK_BATCH_SIZE', BULK_BATCH_SIZE)
+
+    def no_limit_value(self) -> int:
+        """AQL has no LIMIT without a count, an offset alone is sent as LIMIT offset, <this value>."""
+        # The largest integer a double represents exactly, numbers are doubles in ArangoDB.
+        return 2 ** 53 - 1
+
+    def random_function_sql(self) -> str:
+        """Used by order_by('?')."""
+        return 'RAND()'
+
     def max_name_length(self) -> int:
         """Max lenght of collection name."""
         return 254
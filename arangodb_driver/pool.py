@@ -0,0 +1,108 @@
+"""Process wide pool of the clients opened by the DatabaseWrapper.
+
+Django opens and closes its connection on every request when CONN_MAX_AGE is 0.
+The pooled client keeps its HTTP session (and its keep-alive sockets), so a
+new Django connection doesn't pay the TCP and auth setup again.
+"""
+import threading
+import time
+from collections import defaultdict, namedtuple
+from typing import Callable
+
+from arangodb_driver.defines import POOL_SIZE, POOL_MAX_IDLE, POOL_CHECK_AFTER
+
+PoolKey = namedtuple('PoolKey', ['protocol', 'host', 'port', 'username', 'password', 'database', 'codec'])
+
+
+class PooledConnection(object):
+    """A client and its database, with the time it was returned to the pool.
+
+    checked_at is the last time the server was verified (time.monotonic()), it's kept
+    across the Django connections that borrow the client (see DatabaseWrapper.ensure_connection).
+    """
+
+    def __init__(self, key: PoolKey, client, database):
+        self.key = key
+        self.client = client
+        self.database = database
+        self.released_at = None
+        self.checked_at = None
+
+    def idle_time(self, now: float = None) -> float:
+        if self.released_at is None:
+            return 0.0
+        return (now or time.monotonic()) - self.released_at
+
+    def is_alive(self) -> bool:
+        """A HEAD request to the server, as database.verify()."""
+        try:
+            alive = bool(self.database.verify())
+        except Exception:
+            return False
+        if alive:
+            self.checked_at = time.monotonic()
+        return alive
+
+    def close(self):
+        """Closes the sockets of the HTTP session."""
+        close = getattr(self.client.http_client, 'close', None)
+        if close is not None:
+            close()
+
+
+class ConnectionPool(object):
+    """Idle connections by key, the most recently used one is borrowed first.
+
+    Connections idle for more than max_idle seconds are discarded, the ones idle
+    for more than check_after seconds are verified before being borrowed.
+    """
+
+    def __init__(self):
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(connections) for connections in self._idle.values())
+
+    def acquire(self, key: PoolKey, factory: Callable[[], PooledConnection],
+                max_idle: float = POOL_MAX_IDLE, check_after: float = POOL_CHECK_AFTER) -> PooledConnection:
+        """Borrows an idle connection for the key, or opens one with factory()."""
+        while True:
+            now = time.monotonic()
+            expired = []
+            with self._lock:
+                connections = self._idle[key]
+                while connections and connections[0].idle_time(now) > max_idle:
+                    expired.append(connections.pop(0))
+                conn = connections.pop() if connections else None
+            for old in expired:
+                old.close()
+            if conn is None:
+                return factory()
+            if conn.idle_time(now) <= check_after or conn.is_alive():
+                conn.released_at = None
+                return conn
+            conn.close()
+
+    def release(self, conn: PooledConnection, max_size: int = POOL_SIZE):
+        """Returns the connection to the pool, it's closed if the pool of its key is full."""
+        with self._lock:
+            connections = self._idle[conn.key]
+            if len(connections) < max_size:
+                conn.released_at = time.monotonic()
+                connections.append(conn)
+                return
+        conn.close()
+
+    def clear(self):
+        """Closes all idle connections."""
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
+# The process wide pool used by the DatabaseWrapper.
+connection_pool = ConnectionPool()
@@ -0,0 +1,84 @@
+"""The log of the executed queries, with the statistics of the server.
+
+The queries are also checked by the watchdog, if it's enabled (see watchdog.py).
+
+With DEBUG (or connection.force_debug_cursor) each query is added to connection.queries:
+
+    {'sql': 'FOR item IN sample_app_person FILTER item.name == "Foo" RETURN ...',  # with the values bound
+     'time': '0.004',  # seconds until the first batch was received, as Django's query log
+     'aql': 'FOR item IN sample_app_person FILTER item.name == @p0 RETURN ...',
+     'bind_vars': {'p0': 'Foo'},
+     'rowcount': 1,
+     'stats': {'executionTime': 0.0021, 'scannedFull': 3, 'scannedIndex': 0, 'peakMemoryUsage': 32768, ...}}
+
+The query_executed signal is sent with the same dict for every query, with or without
+DEBUG, to ship them to a metrics system. Without DEBUG, its 'sql' is only built when
+it's read by query['sql'] (query.get('sql') doesn't build it):
+
+    @receiver(query_executed)
+    def send_metrics(sender, connection, query, **kwargs):
+        statsd.timing('arangodb.query', query['stats'].get('executionTime', 0))
+"""
+import logging
+import time
+
+from django.db.backends.utils import CursorWrapper
+from django.dispatch import Signal
+
+from arangodb_driver.cursor import bind_vars, interpolate
+
+logger = logging.getLogger('django.db.backends')
+
+# Sent after each AQL query with the connection (a DatabaseWrapper) and the query (the dict of connection.queries).
+query_executed = Signal(providing_args=['connection', 'query'])
+
+
+def is_profiled(db) -> bool:
+    """True if the queries must be recorded: for the log, the watchdog or the receivers of query_executed."""
+    return db.queries_logged or db.watchdog is not None or query_executed.has_listeners()
+
+
+class QueryRecord(dict):
+    """The dict of a recorded query, its 'sql' is only built when it's read (query['sql']).
+
+    Binding the values encodes all of them, it's only done for the log, the reports of
+    the watchdog and the receivers that read it.
+    """
+
+    def __missing__(self, key):
+        if key != 'sql':
+            raise KeyError(key)
+        self['sql'] = sql = interpolate(self['aql'], self['bind_vars'])
+        return sql
+
+
+def record_query(db, aql: str, params, cursor, duration: float):
+    """Adds the query to the log of the connection and sends query_executed."""
+    query = QueryRecord(
+        time='%.3f' % duration,
+        aql=aql,
+        bind_vars=bind_vars(params) or {},
+        rowcount=cursor.rowcount,
+        stats=cursor.stats,
+    )
+    if db.queries_logged:
+        query['sql']  # Built now, the log is read as Django's (e.g. 'sql' in query).
+        db.queries_log.append(query)
+    logger.debug('(%.3f) %s; args=%s', duration, aql, params,
+                 extra={'duration': duration, 'sql': aql, 'params': params, 'stats': cursor.stats})
+    if db.watchdog is not None:
+        db.watchdog.check(query, duration)
+    query_executed.send(sender=db.__class__, connection=db, query=query)
+
+
+class ProfilingCursorWrapper(CursorWrapper):
+    """Records the queries executed by the cursor (see record_query), it's used instead of Django's debug cursor."""
+
+    def execute(self, sql, params=None):
+        if not is_profiled(self.db):
+            return super().execute(sql, params)
+        start = time.monotonic()
+        try:
+            return super().execute(sql, params)
+        finally:
+            record_query(self.db, sql, params, self.cursor, time.monotonic() - start)
@@ -0,0 +1,61 @@
+# Compiled AQL cache.
+import threading
+from collections import OrderedDict, namedtuple
+
+from arangodb_driver.defines import QUERY_CACHE_SIZE
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class AQLCache(object):
+    """Bounded LRU cache of compiled queries, keyed by the shape of the query.
+
+    It's shared by the whole process, the shape must contain everything that
+    changes the AQL text (but not the values, that are bind parameters).
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached entry for the key (marking it as recently used) or None."""
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        """Stores the entry, discarding the least recently used ones if the cache is full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        """Same idea of functools.lru_cache().cache_info()."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+# The process wide cache used by the compiler.
+aql_cache = AQLCache()
@@ -1,19 +1,226 @@
+from typing import List, Dict
+
 from arango.exceptions import CollectionCreateError
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
 from django.db.models.base import ModelBase
 
+from arangodb_driver.defines import EDGE_MODEL_TYPE
+from arangodb_driver.models.indexes import get_index_options
+
+
+def is_edge_model(model) -> bool:
+    # Not issubclass(model, EdgeModel): the backend is loaded by the first model class, before EdgeModel.
+    if getattr(model, 'model_type', None) == EDGE_MODEL_TYPE:
+        return True
+    # The models of the migrations don't have the attributes of the class, only its fields.
+    columns = {field.column for field in model._meta.concrete_fields}
+    return {'_from', '_to'}.issubset(columns)
+
+
+def get_auto_created_models(model) -> List[ModelBase]:
+    """The intermediary models Django created for the many-to-many fields of the model.
+
+    The intermediary model of a ManyToMany with an edge_model is the edge model, it has
+    its own migration.
+    """
+    return [field.remote_field.through for field in model._meta.local_many_to_many
+            if field.remote_field.through._meta.auto_created]
+
+
+def get_graph_name(model) -> str:
+    """The named graph of an edge model."""
+    return getattr(model, 'graph_name', None) or model._meta.app_label
+
 
 class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
+    """Creates the collections and their indexes.
+
+    The documents have no schema, adding or removing a field only changes its indexes:
+
+    * db_index=True: a persistent index.
+    * unique=True: a unique persistent index, sparse if the field is nullable (as
+      NULL values don't collide in SQL).
+    * Meta.unique_together and Meta.index_together: a persistent index of the fields.
+    * Meta.indexes: the index types of arangodb_driver.models.indexes, Django's
+      Index is a persistent index.
+
+    The indexes are created with the names Django gives them, so they can be found
+    again by the introspection (see DatabaseIntrospection.get_constraints).
 
-    def create_model(self, model: ModelBase):
-        # TODO: Diferenciar se é edge collection.
+    The EdgeModels are edge collections, indexed by _from and _to by the server, and
+    are added to their named graph (see EdgeModel.graph_name).
+    """
+
+    def create_model(self, model: ModelBase, edge: bool = None):
+        """Creates the collection of the model and of its intermediary models.
+
+        edge is True for the intermediary models of the ManyToMany fields, their links are edges.
+        """
         name = model._meta.db_table
+        if edge is None:
+            edge = is_edge_model(model)
         try:
-            self.connection.database.create_collection(name, edge=False)
+            self.connection.database.create_collection(name, edge=edge)
         except CollectionCreateError:
             print("Collection {} already exists.".format(name))
+        for options in self.get_model_index_options(model):
+            self.create_index(model, options)
+        if is_edge_model(model):
+            self.add_edge_definition(model)
+        for field in model._meta.local_many_to_many:
+            self.create_through_model(field)
 
+    def create_through_model(self, field):
+        """Creates the collection of the intermediary model Django created for the field, if it did."""
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            self.create_model(through, edge=hasattr(field, 'edge_collection'))
 
     def delete_model(self, model):
-        raise NotImplementedError
+        for through in get_auto_created_models(model):
+            self.delete_model(through)
+        if is_edge_model(model):
+            self.remove_edge_definition(model)
+        self.connection.database.delete_collection(model._meta.db_table, ignore_missing=True)
+
+    def get_edge_definition(self, model) -> Dict:
+        """The edge definition of an edge model in its graph, None if it lacks the _from or the _to field."""
+        vertices = {}
+        for field in model._meta.concrete_fields:
+            if field.column in ('_from', '_to'):
+                vertices[field.column] = field.remote_field.model._meta.db_table
+        if len(vertices) != 2:
+            return None
+        return {'collection': model._meta.db_table, 'from': [vertices['_from']], 'to': [vertices['_to']]}
+
+    def get_graphs(self) -> Dict[str, Dict]:
+        """The edge definitions of each named graph, by graph name and edge collection."""
+        body = self.connection.api('get', '/_api/gharial')
+        return {graph['_key']: {definition['collection']: definition for definition in graph['edgeDefinitions']}
+                for graph in body['graphs']}
+
+    def add_edge_definition(self, model):
+        """Adds the edge collection to its graph, the graph is created if it doesn't exist."""
+        definition = self.get_edge_definition(model)
+        if definition is None:
+            return
+        graph_name = get_graph_name(model)
+        graph = self.get_graphs().get(graph_name)
+        if graph is None:
+            self.connection.api('post', '/_api/gharial', {'name': graph_name, 'edgeDefinitions': [definition]})
+        elif definition['collection'] not in graph:
+            self.connection.api('post', '/_api/gharial/%s/edge' % graph_name, definition)
+        elif graph[definition['collection']] != definition:
+            self.connection.api('put', '/_api/gharial/%s/edge/%s' % (graph_name, definition['collection']),
+                                definition)
+
+    def remove_edge_definition(self, model):
+        """Removes the edge collection from its graph, the collections are kept."""
+        graph_name = get_graph_name(model)
+        if model._meta.db_table in self.get_graphs().get(graph_name, {}):
+            self.connection.api('delete', '/_api/gharial/%s/edge/%s' % (graph_name, model._meta.db_table),
+                                params={'dropCollections': 'false'})
+
+    def get_field_index_options(self, model, field) -> List[Dict]:
+        """The indexes of a field, from db_index and unique.
+
+        The key and the _from/_to of the edges have indexes of their own (the edge index).
+        """
+        if not field.concrete or field.primary_key or field.column in ('_from', '_to'):
+            return []
+        if field.unique:
+            return [{'type': 'persistent', 'fields': [field.column], 'unique': True, 'sparse': field.null,
+                     'name': self._create_index_name(model, [field.column], suffix='_uniq')}]
+        if field.db_index:
+            return [{'type': 'persistent', 'fields': [field.column],
+                     'name': self._create_index_name(model, [field.column], suffix='_idx')}]
+        return []
+
+    def get_together_index_options(self, model, field_names, unique: bool) -> Dict:
+        columns = [model._meta.get_field(field_name).column for field_name in field_names]
+        options = {'type': 'persistent', 'fields': columns,
+                   'name': self._create_index_name(model, columns, suffix='_uniq' if unique else '_idx')}
+        if unique:
+            options['unique'] = True
+        return options
+
+    def get_model_index_options(self, model) -> List[Dict]:
+        """All indexes of the model, see the class docstring."""
+        options = []
+        for field in model._meta.local_fields:
+            options.extend(self.get_field_index_options(model, field))
+        for field_names in model._meta.unique_together:
+            options.append(self.get_together_index_options(model, field_names, unique=True))
+        for field_names in model._meta.index_together:
+            options.append(self.get_together_index_options(model, field_names, unique=False))
+        for index in model._meta.indexes:
+            options.append(get_index_options(model, index))
+        return options
+
+    def create_index(self, model, options: Dict):
+        """Creates the index, nothing is done if an index with the same definition exists."""
+        self.connection.api('post', '/_api/index', options, params={'collection': model._meta.db_table})
+
+    def drop_index(self, model, name: str):
+        """Drops the index with the given name, if it exists."""
+        constraints = self.connection.introspection.get_constraints(None, model._meta.db_table)
+        if name in constraints:
+            self.connection.api('delete', '/_api/index/%s' % constraints[name]['id'])
+
+    def add_index(self, model, index):
+        self.create_index(model, get_index_options(model, index))
+
+    def remove_index(self, model, index):
+        self.drop_index(model, index.name)
+
+    def add_field(self, model, field):
+        if field.many_to_many:
+            return self.create_through_model(field)
+        for options in self.get_field_index_options(model, field):
+            self.create_index(model, options)
+
+    def remove_field(self, model, field):
+        """Drops the indexes of the field, its values are kept in the documents."""
+        if field.many_to_many:
+            if field.remote_field.through._meta.auto_created:
+                self.delete_model(field.remote_field.through)
+            return
+        for options in self.get_field_index_options(model, field):
+            self.drop_index(model, options['name'])
+
+    def alter_field(self, model, old_field, new_field, strict=False):
+        """Renames the attribute in the documents if the column changed and updates the indexes of the field."""
+        old_options = self.get_field_index_options(model, old_field)
+        new_options = self.get_field_index_options(model, new_field)
+        for options in old_options:
+            if options not in new_options:
+                self.drop_index(model, options['name'])
+        if old_field.concrete and new_field.concrete and old_field.column != new_field.column:
+            aql = 'FOR item IN %s FILTER HAS(item, @p0) ' \
+                  'UPDATE item WITH {[@p1]: item[@p0], [@p0]: null} IN %s OPTIONS {keepNull: false}'
+            with self.connection.cursor() as cursor:
+                cursor.execute(aql % (model._meta.db_table, model._meta.db_table), [old_field.column, new_field.column])
+        for options in new_options:
+            if options not in old_options:
+                self.create_index(model, options)
+        if is_edge_model(model) and new_field.column in ('_from', '_to'):
+            self.add_edge_definition(model)
+
+    def alter_unique_together(self, model, old_unique_together, new_unique_together):
+        self._alter_together(model, old_unique_together, new_unique_together, unique=True)
+
+    def alter_index_together(self, model, old_index_together, new_index_together):
+        self._alter_together(model, old_index_together, new_index_together, unique=False)
+
+    def _alter_together(self, model, old_together, new_together, unique: bool):
+        olds = {tuple(fields) for fields in old_together}
+        news = {tuple(fields) for fields in new_together}
+        for field_names in olds.difference(news):
+            self.drop_index(model, self.get_together_index_options(model, field_names, unique)['name'])
+        for field_names in news.difference(olds):
+            self.create_index(model, self.get_together_index_options(model, field_names, unique))
 
+    def alter_db_table(self, model, old_db_table, new_db_table):
+        if old_db_table == new_db_table:
+            return
+        self.connection.api('put', '/_api/collection/%s/rename' % old_db_table, {'name': new_db_table})
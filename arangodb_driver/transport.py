@@ -0,0 +1,287 @@
+"""HTTP layer between python-arango and the server.
+
+python-arango serializes the request bodies with the standard library and
+decodes the responses in arango.response.Response. The classes here use the
+codec of the connection (see codec.py) for both.
+"""
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Sequence
+
+import requests
+from arango.connection import Connection
+from arango.database import Database
+from arango.http_clients import DefaultHTTPClient
+from arango.response import Response
+
+from arangodb_driver.codec import JSONCodec
+from arangodb_driver.cursor import is_read_only
+from arangodb_driver.defines import BREAKER_THRESHOLD, BREAKER_RESET, MAX_PINNED_CURSORS
+
+
+_query_key_re = re.compile(r'"query"\s*:\s*')
+_json_decoder = json.JSONDecoder()
+
+
+def get_body_query(body: str):
+    """The AQL of a cursor request body, only its string is decoded (not the bind variables)."""
+    match = _query_key_re.search(body)
+    if match is None:
+        return None
+    try:
+        query, _ = _json_decoder.raw_decode(body, match.end())
+    except ValueError:
+        return None
+    return query if isinstance(query, str) else None
+
+
+class CodecHTTPClient(DefaultHTTPClient):
+    """A requests based client that decodes the response bodies with the codec.
+
+    Response only decodes str bodies, the already decoded body is kept as is.
+    """
+
+    def __init__(self, codec: JSONCodec, use_session: bool = True, check_cert: bool = True):
+        super().__init__(use_session=use_session, check_cert=check_cert)
+        self.codec = codec
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        res = getattr(self._session, method)(url=url, verify=self._check_cert, **kwargs)
+        try:
+            body = self.codec.loads(res.content)
+        except ValueError:
+            # Empty (HEAD) or not JSON.
+            body = res.text
+        return Response(
+            url=url,
+            method=method,
+            headers=res.headers,
+            http_code=res.status_code,
+            http_text=res.reason,
+            body=body
+        )
+
+    def close(self):
+        """Closes the keep-alive sockets of the session."""
+        if isinstance(self._session, requests.Session):
+            self._session.close()
+
+    def head(self, url, params=None, headers=None, auth=None):
+        return self.request('head', url, params=params, headers=headers, auth=auth)
+
+    def get(self, url, params=None, headers=None, auth=None):
+        return self.request('get', url, params=params, headers=headers, auth=auth)
+
+    def put(self, url, data, params=None, headers=None, auth=None):
+        return self.request('put', url, data=data, params=params, headers=headers, auth=auth)
+
+    def post(self, url, data, params=None, headers=None, auth=None):
+        return self.request('post', url, data=data, params=params, headers=headers, auth=auth)
+
+    def patch(self, url, data, params=None, headers=None, auth=None):
+        return self.request('patch', url, data=data, params=params, headers=headers, auth=auth)
+
+    def delete(self, url, data=None, params=None, headers=None, auth=None):
+        return self.request('delete', url, data=data, params=params, headers=headers, auth=auth)
+
+
+def base_url(host: str, protocol: str = 'http') -> str:
+    """'coordinator1:8529' or 'http://coordinator1:8529' -> 'http://coordinator1:8529'."""
+    host = host.rstrip('/')
+    return host if '://' in host else '%s://%s' % (protocol, host)
+
+
+_url_re = re.compile(r'^\w+://[^/]+')
+_cursor_re = re.compile(r'/_api/cursor/([^/?]+)')
+
+
+class CircuitBreaker(object):
+    """Opens after threshold consecutive failures, the host is skipped for reset_after seconds.
+
+    After that one request is let through (half open), a success closes the breaker.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_after: float = BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+
+    def is_available(self, now: float) -> bool:
+        return self.opened_at is None or now - self.opened_at >= self.reset_after
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self, now: float):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = now
+
+
+class Coordinator(object):
+    """A host of the cluster, with its breaker and the number of requests in progress."""
+
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url
+        self.breaker = breaker
+        self.outstanding = 0
+
+    def __repr__(self):
+        return '<Coordinator %s>' % self.url
+
+
+class LoadBalancingHTTPClient(CodecHTTPClient):
+    """Spreads the requests over the coordinators of a cluster (DATABASES['HOSTS']).
+
+    The strategy chooses the coordinator of each request:
+
+    * 'round_robin': one after the other (default).
+    * 'random'
+    * 'least_outstanding': the one with fewer requests in progress.
+
+    Coordinators whose breaker is open are skipped. Reads (GET, HEAD and read only
+    AQL queries) that fail to connect or get a 503 are sent to the next coordinator.
+    A server cursor only exists in the coordinator that created it, the requests of
+    its next batches are always sent there. The cursors that are never read to the end
+    (they expire in the server) are forgotten once MAX_PINNED_CURSORS cursors were
+    used after them.
+    """
+    strategies = ('round_robin', 'random', 'least_outstanding')
+
+    def __init__(self, codec: JSONCodec, hosts: Sequence[str], strategy: str = None,
+                 threshold: int = BREAKER_THRESHOLD, reset_after: float = BREAKER_RESET,
+                 use_session: bool = True, check_cert: bool = True):
+        super().__init__(codec, use_session=use_session, check_cert=check_cert)
+        if not hosts:
+            raise ValueError("At least one host is required.")
+        strategy = strategy or 'round_robin'
+        if strategy not in self.strategies:
+            raise ValueError("The load balancing strategy must be one of: {}.".format(', '.join(self.strategies)))
+        self.strategy = strategy
+        self.coordinators = [Coordinator(base_url(host), CircuitBreaker(threshold, reset_after)) for host in hosts]
+        self._counter = itertools.count()
+        # The coordinator of each cursor with more batches, by cursor id, the most recently used last.
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_coordinators(self) -> List[Coordinator]:
+        """Returns the coordinators in the order they are tried, the ones with an open breaker go last."""
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._counter) % len(self.coordinators)
+            ordered = self.coordinators[start:] + self.coordinators[:start]
+            if self.strategy == 'random':
+                random.shuffle(ordered)
+            elif self.strategy == 'least_outstanding':
+                ordered.sort(key=lambda coordinator: coordinator.outstanding)
+            available = [coordinator for coordinator in ordered if coordinator.breaker.is_available(now)]
+        # If every breaker is open there is nothing to lose trying them.
+        return available + [coordinator for coordinator in ordered if coordinator not in available]
+
+    def is_retryable(self, method: str, path: str, data) -> bool:
+        """True for the requests that can be sent again to another coordinator."""
+        if method in ('get', 'head'):
+            return True
+        if method != 'post' or not path.endswith('/_api/cursor') or not isinstance(data, str):
+            return False
+        query = get_body_query(data)
+        return query is not None and is_read_only(query)
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        path = _url_re.sub('', url)
+        cursor = _cursor_re.search(path)
+        with self._lock:
+            pinned = self._cursors.get(cursor.group(1)) if cursor else None
+            if pinned is not None:
+                self._cursors.move_to_end(cursor.group(1))
+        if pinned is not None:
+            coordinators = [pinned]
+        elif self.is_retryable(method, path, kwargs.get('data')):
+            coordinators = self.get_coordinators()
+        else:
+            coordinators = self.get_coordinators()[:1]
+
+        response, error = None, None
+        for coordinator in coordinators:
+            with self._lock:
+                coordinator.outstanding += 1
+            try:
+                response = super().request(method, coordinator.url + path, **kwargs)
+            except requests.RequestException as request_error:
+                response, error = None, request_error
+                coordinator.breaker.failure(time.monotonic())
+                continue
+            finally:
+                with self._lock:
+                    coordinator.outstanding -= 1
+            if response.status_code == 503:
+                coordinator.breaker.failure(time.monotonic())
+                continue
+            coordinator.breaker.success()
+            self.track_cursor(method, path, cursor, response, coordinator)
+            return response
+        if response is not None:
+            return response
+        raise error
+
+    def track_cursor(self, method: str, path: str, cursor, response: Response, coordinator: Coordinator):
+        """Pins the cursors with more batches to the coordinator that has them."""
+        body = response.body if isinstance(response.body, dict) else {}
+        with self._lock:
+            if cursor is None:
+                if method == 'post' and path.endswith('/_api/cursor') and body.get('hasMore'):
+                    self._cursors[body['id']] = coordinator
+                    if len(self._cursors) > MAX_PINNED_CURSORS:
+                        self._cursors.popitem(last=False)
+            elif method == 'delete' or not body.get('hasMore'):
+                self._cursors.pop(cursor.group(1), None)
+
+
+class CodecConnection(Connection):
+    """A python-arango connection that encodes the request bodies with the codec.
+
+    Strings are sent as they are by python-arango, so the bodies are encoded here.
+    """
+
+    def __init__(self, codec: JSONCodec, **kwargs):
+        super().__init__(**kwargs)
+        self.codec = codec
+
+    def encode(self, data):
+        if data is None or isinstance(data, str):
+            return data
+        return self.codec.dumps(data)
+
+    def put(self, endpoint, data=None, params=None, headers=None, **_):
+        return super().put(endpoint, data=self.encode(data), params=params, headers=headers)
+
+    def post(self, endpoint, data=None, params=None, headers=None, **_):
+        return super().post(endpoint, data=self.encode(data), params=params, headers=headers)
+
+    def patch(self, endpoint, data=None, params=None, headers=None, **_):
+        return super().patch(endpoint, data=self.encode(data), params=params, headers=headers)
+
+    def delete(self, endpoint, data=None, params=None, headers=None, **_):
+        return super().delete(endpoint, data=self.encode(data), params=params, headers=headers)
+
+
+def open_database(client, name: str, codec: JSONCodec) -> Database:
+    """Same as client.database(name), but the requests of the database go through the codec."""
+    return Database(CodecConnection(
+        codec,
+        protocol=client.protocol,
+        host=client.host,
+        port=client.port,
+        database=name,
+        username=client.username,
+        password=client.password,
+        http_client=client.http_client,
+        enable_logging=client.logging_enabled
+    ))
@@ -0,0 +1,115 @@
+"""Reports the slow queries and the queries that read whole collections, with the Python code that ran them.
+
+Enabled by DATABASES['OPTIONS'] (see defines.DRIVER_OPTIONS):
+
+    'OPTIONS': {
+        'SLOW_QUERY_THRESHOLD': 0.5,  # seconds
+        'FULL_SCAN_RATIO': 100,  # documents read without index per returned row
+        'FULL_SCAN_MIN': 1000,
+        'WATCHDOG_SAMPLE_RATE': 0.1,
+        'WATCHDOG_INTERVAL': 60,
+    }
+
+The reports are warnings of the 'arangodb_driver.watchdog' logger. A query (its AQL,
+without the values) is reported at most once every WATCHDOG_INTERVAL seconds by the
+process, whatever the thread (each thread has its own DatabaseWrapper and watchdog),
+and only a WATCHDOG_SAMPLE_RATE fraction of the problematic queries is reported.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from typing import Mapping, List, Optional
+
+import django
+
+from arangodb_driver.defines import FULL_SCAN_MIN, WATCHDOG_SAMPLE_RATE, WATCHDOG_INTERVAL, WATCHDOG_MAX_KEYS
+
+logger = logging.getLogger('arangodb_driver.watchdog')
+
+# Frames of these directories are left out of the reported stack, it shows the code that made the query.
+LIBRARY_DIRS = (os.path.dirname(django.__file__) + os.sep, os.path.dirname(__file__) + os.sep)
+
+
+def get_caller_stack(limit: int = 10) -> List[str]:
+    """The last frames of the stack outside of Django and the driver, formatted as in a traceback."""
+    frames = traceback.extract_stack()[:-1]
+    callers = [frame for frame in frames if not frame.filename.startswith(LIBRARY_DIRS)] or frames
+    return traceback.format_list(callers[-limit:])
+
+
+class ReportLimiter(object):
+    """The last report time of each AQL, shared by the watchdogs of all threads."""
+
+    def __init__(self):
+        self.reported_at = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, aql: str, now: float, interval: float) -> bool:
+        """True if the query wasn't reported in the last interval seconds, it's then taken as reported now."""
+        with self._lock:
+            reported_at = self.reported_at.get(aql)
+            if reported_at is not None and now - reported_at < interval:
+                return False
+            if len(self.reported_at) >= WATCHDOG_MAX_KEYS:
+                self.reported_at = {key: value for key, value in self.reported_at.items()
+                                    if now - value < interval}
+            self.reported_at[aql] = now
+            return True
+
+
+# The limiter of the process, used by default.
+report_limiter = ReportLimiter()
+
+
+class QueryWatchdog(object):
+    """Checks the queries recorded by profiling.record_query, see the module docstring."""
+
+    def __init__(self, slow_threshold: float = None, full_scan_ratio: float = None,
+                 full_scan_min: int = FULL_SCAN_MIN, sample_rate: float = WATCHDOG_SAMPLE_RATE,
+                 interval: float = WATCHDOG_INTERVAL, limiter: ReportLimiter = None):
+        self.slow_threshold = slow_threshold
+        self.full_scan_ratio = full_scan_ratio
+        self.full_scan_min = full_scan_min
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.limiter = limiter or report_limiter
+
+    @classmethod
+    def from_options(cls, options: Mapping) -> Optional['QueryWatchdog']:
+        """The watchdog configured by the driver options, None if neither threshold is set."""
+        if options.get('SLOW_QUERY_THRESHOLD') is None and options.get('FULL_SCAN_RATIO') is None:
+            return None
+        return cls(options.get('SLOW_QUERY_THRESHOLD'), options.get('FULL_SCAN_RATIO'),
+                   options.get('FULL_SCAN_MIN', FULL_SCAN_MIN),
+                   options.get('WATCHDOG_SAMPLE_RATE', WATCHDOG_SAMPLE_RATE),
+                   options.get('WATCHDOG_INTERVAL', WATCHDOG_INTERVAL))
+
+    def get_problems(self, query: Mapping, duration: float) -> List[str]:
+        """Why the query must be reported, empty if it's fine."""
+        problems = []
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            problems.append('Slow query (%.3fs)' % duration)
+        scanned_full = query['stats'].get('scannedFull') or 0
+        if self.full_scan_ratio is not None and scanned_full >= self.full_scan_min:
+            rows = max(query['rowcount'], 1)
+            if scanned_full > self.full_scan_ratio * rows:
+                problems.append('Full collection scan (%d documents read without index for %d rows)' %
+                                (scanned_full, max(query['rowcount'], 0)))
+        return problems
+
+    def should_report(self, aql: str, now: float) -> bool:
+        """Applies the sampling and the rate limit of each query."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+        return self.limiter.acquire(aql, now, self.interval)
+
+    def check(self, query: Mapping, duration: float):
+        problems = self.get_problems(query, duration)
+        if not problems or not self.should_report(query['aql'], time.monotonic()):
+            return
+        logger.warning('%s: %s\nstats=%s\nCalled from:\n%s', ', '.join(problems), query['sql'],
+                       query['stats'], ''.join(get_caller_stack()),
+                       extra={'query': query, 'duration': duration, 'problems': problems})
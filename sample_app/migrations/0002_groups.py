@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 12:55
+from __future__ import unicode_literals
+
+import arangodb_driver.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sample_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('_key', arangodb_driver.models.fields.AutoField(primary_key=True, serialize=False)),
+                ('name', arangodb_driver.models.fields.CharField(max_length=150)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveField(
+            model_name='person',
+            name='id',
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='_key',
+            field=arangodb_driver.models.fields.AutoField(default=None, primary_key=True, serialize=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='age',
+            field=models.IntegerField(default=None),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='name',
+            field=arangodb_driver.models.fields.CharField(max_length=150),
+        ),
+        migrations.CreateModel(
+            name='Belongs',
+            fields=[
+                ('_key', arangodb_driver.models.fields.AutoField(primary_key=True, serialize=False)),
+                ('join_date', models.DateField()),
+                ('_from', arangodb_driver.models.fields.FromField(on_delete=django.db.models.deletion.CASCADE, to='sample_app.Person')),
+                ('_to', arangodb_driver.models.fields.ToField(on_delete=django.db.models.deletion.CASCADE, to='sample_app.Group')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='groups',
+            field=arangodb_driver.models.fields.ManyToMany(edge_model='sample_app.Belongs', to='sample_app.Group'),
+        ),
+    ]
@@ -14,7 +14,7 @@ from arangodb_driver.models.models import VertexModel, EdgeModel
 class Person(VertexModel):
     name = CharField(max_length=150)
     age = models.IntegerField()
-    groups = ManyToMany(to='Group')
+    groups = ManyToMany(to='Group', edge_model='Belongs')
 
 
 class Group(VertexModel):
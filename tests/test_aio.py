@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from arangodb_driver.aio import AsyncArangoCursor, AsyncConnection, async_cursor_iter
+from arangodb_driver.codec import get_codec
+from arangodb_driver.cursor import IntegrityError, ProgrammingError
+
+pytest.importorskip('aiohttp')
+
+BATCHES = [[[1], [2]], [[3], [4]], [[5]]]
+
+
+class ServerHandler(BaseHTTPRequestHandler):
+    """A cursor over BATCHES and a collection where only the document 'existing' exists."""
+
+    def reply(self, status, body):
+        self.server.requests.append((self.command, self.path))
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def batch(self, index):
+        batch = {'id': '42', 'result': BATCHES[index], 'hasMore': index + 1 < len(BATCHES)}
+        if self.server.count:
+            batch['count'] = 5
+        return batch
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.path.endswith('/_api/cursor'):
+            if 'INSERT' in body['query']:
+                self.reply(409, {'error': True, 'errorNum': 1210, 'errorMessage': 'unique constraint violated'})
+            else:
+                self.server.count = body.get('count')
+                self.reply(201, self.batch(0))
+        else:
+            self.reply(201, {'_key': body.get('_key', 'new'), '_id': 'Person/new', '_rev': '1'})
+
+    def do_PUT(self):
+        self.server.position += 1
+        self.reply(200, self.batch(self.server.position))
+
+    def do_PATCH(self):
+        key = self.path.rsplit('/', 1)[-1]
+        if key == 'existing':
+            self.reply(202, {'_key': key, '_id': 'Person/' + key, '_rev': '2'})
+        else:
+            self.reply(404, {'error': True, 'errorNum': 1202, 'errorMessage': 'document not found'})
+
+    def do_DELETE(self):
+        self.reply(202, {'id': '42'})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ServerHandler)
+    server.requests = []
+    server.position = 0
+    server.count = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run(server, coroutine_function):
+    async def main():
+        connection = AsyncConnection('http://127.0.0.1:%d' % server.server_address[1], 'test', 'root', '',
+                                     get_codec())
+        try:
+            return await coroutine_function(connection)
+        finally:
+            await connection.close()
+    return asyncio.run(main())
+
+
+def test_batches(server):
+    async def fetch(connection):
+        cursor = AsyncArangoCursor(connection, batch_size=2)
+        await cursor.execute('FOR item IN Person RETURN [item._key]')
+        return [batch async for batch in async_cursor_iter(cursor)]
+
+    assert run(server, fetch) == BATCHES
+    assert [method for method, _ in server.requests] == ['POST', 'PUT', 'PUT']
+
+
+def test_fetch(server):
+    async def fetch(connection):
+        cursor = AsyncArangoCursor(connection, count=True)
+        await cursor.execute('FOR item IN Person RETURN [item._key]')
+        first = await cursor.fetchone()
+        many = await cursor.fetchmany(2)
+        rest = await cursor.fetchall()
+        return first, many, rest, cursor.rowcount
+
+    assert run(server, fetch) == ([1], [[2], [3]], [[4], [5]], 5)
+
+
+def test_rowcount_without_count(server):
+    async def fetch(connection):
+        cursor = AsyncArangoCursor(connection)
+        await cursor.execute('FOR item IN Person RETURN [item._key]')
+        return cursor.rowcount
+
+    # The results don't fit in the first batch, their number is unknown.
+    assert run(server, fetch) == -1
+
+
+def test_close_deletes_server_cursor(server):
+    async def fetch(connection):
+        cursor = AsyncArangoCursor(connection)
+        await cursor.execute('FOR item IN Person RETURN [item._key]')
+        row = await cursor.fetchone()
+        await cursor.close()
+        return row
+
+    assert run(server, fetch) == [1]
+    assert server.requests[-1] == ('DELETE', '/_db/test/_api/cursor/42')
+
+
+def test_errors(server):
+    async def insert(connection):
+        cursor = AsyncArangoCursor(connection)
+        await cursor.execute('INSERT @p0 IN Person', [{'name': 'Eggs'}])
+
+    with pytest.raises(IntegrityError):
+        run(server, insert)
+
+    async def fetch(connection):
+        await AsyncArangoCursor(connection).fetchone()
+
+    with pytest.raises(ProgrammingError):
+        run(server, fetch)
+
+
+def test_save_document(server):
+    async def save(connection):
+        updated = await connection.save_document('Person', {'_key': 'existing', 'name': 'Eggs'})
+        inserted = await connection.save_document('Person', {'_key': 'missing', 'name': 'Spam'})
+        new = await connection.save_document('Person', {'name': 'Ham'})
+        return updated[1], inserted[1], new
+
+    assert run(server, save) == (False, True, ({'_key': 'new', '_id': 'Person/new', '_rev': '1'}, True))
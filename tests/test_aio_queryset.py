@@ -0,0 +1,111 @@
+import asyncio
+
+import django
+import pytest
+from django.db import connection
+
+django.setup()
+
+from arangodb_driver.compiler import SQLCompiler
+from sample_app.models import Person
+
+# The rows of Person.objects.all(): [_key, name, age].
+BATCHES = [[['1', 'Foo', 30], ['2', 'Bar', 31]], [['3', 'Spam', 32]], []]
+
+
+class FakeAsyncConnection(object):
+    """Answers the requests of the asyncio path with a server cursor over the batches, documents are saved."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.position = 0
+        self.requests = []
+        self.saved = []
+
+    def batch(self):
+        return {'id': '42', 'result': [list(row) for row in self.batches[self.position]],
+                'hasMore': self.position + 1 < len(self.batches), 'count': sum(map(len, self.batches))}
+
+    async def request(self, method, endpoint, data=None, missing_ok=False):
+        self.requests.append((method, endpoint))
+        if method == 'post':
+            self.position = 0
+        elif method == 'put':
+            self.position += 1
+        else:
+            return {'id': '42'}
+        return self.batch()
+
+    async def save_document(self, collection, document):
+        self.saved.append((collection, document))
+        key = document.get('_key', 'new')
+        return {'_key': key, '_id': '%s/%s' % (collection, key), '_rev': '1'}, '_key' not in document
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeAsyncConnection(BATCHES)
+    monkeypatch.setattr(connection, 'async_connection', lambda: server, raising=False)
+    return server
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_aiter(server, monkeypatch):
+    compiled = []
+    as_sql = SQLCompiler.as_sql
+
+    def counting_as_sql(compiler, *args, **kwargs):
+        compiled.append(compiler)
+        return as_sql(compiler, *args, **kwargs)
+    monkeypatch.setattr(SQLCompiler, 'as_sql', counting_as_sql)
+
+    async def fetch():
+        return [person async for person in Person.objects.all()]
+    people = run(fetch())
+    assert [(person.pk, person.name, person.age) for person in people] == [
+        ('1', 'Foo', 30), ('2', 'Bar', 31), ('3', 'Spam', 32)]
+    # The batches come from the same server cursor.
+    assert [method for method, _ in server.requests] == ['post', 'put', 'put']
+    # The query is compiled for the request and for the decoding of the rows, not for each batch.
+    assert len(compiled) == 2
+
+
+def test_aiter_values(server):
+    server.batches = [[['Foo'], ['Bar']], [['Spam']]]
+
+    async def fetch():
+        return [name async for name in Person.objects.values_list('name', flat=True)]
+    assert run(fetch()) == ['Foo', 'Bar', 'Spam']
+
+
+def test_acount(monkeypatch):
+    server = FakeAsyncConnection([[[3]]])
+    monkeypatch.setattr(connection, 'async_connection', lambda: server, raising=False)
+    assert run(Person.objects.filter(name='Foo').acount()) == 3
+
+
+def test_aget(monkeypatch):
+    server = FakeAsyncConnection([[['1', 'Foo', 30]]])
+    monkeypatch.setattr(connection, 'async_connection', lambda: server, raising=False)
+    person = run(Person.objects.aget(name='Foo'))
+    assert (person.pk, person.name) == ('1', 'Foo')
+
+    server.batches = [[]]
+    with pytest.raises(Person.DoesNotExist):
+        run(Person.objects.aget(name='Foo'))
+    server.batches = [[['1', 'Foo', 30]], [['2', 'Foo', 31]]]
+    with pytest.raises(Person.MultipleObjectsReturned):
+        run(Person.objects.aget(name='Foo'))
+
+
+def test_asave(server):
+    person = Person(name='Foo', age=30)
+    run(person.asave())
+    assert person.pk == 'new'
+    assert not person._state.adding
+    assert server.saved == [('sample_app_person', {'name': 'Foo', 'age': 30})]
+    run(person.asave())
+    assert server.saved[-1] == ('sample_app_person', {'_key': 'new', 'name': 'Foo', 'age': 30})
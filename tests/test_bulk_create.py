@@ -0,0 +1,57 @@
+import django
+import pytest
+from django.db import IntegrityError, connection
+
+django.setup()
+
+from sample_app.models import Person
+
+
+class InsertCollection(object):
+    """A collection whose second document is a duplicate."""
+    def __init__(self):
+        self.imported = []
+        self.on_duplicate = []
+
+    def insert_many(self, documents):
+        return [{'_key': '1'}, Exception('unique constraint violated'), {'_key': '3'}]
+
+    def import_bulk(self, documents, halt_on_error=None, on_duplicate=None):
+        assert halt_on_error
+        self.imported.extend(documents)
+        self.on_duplicate.append(on_duplicate)
+        return {'created': 0, 'errors': 0}
+
+
+@pytest.fixture
+def insert_collection(monkeypatch):
+    collection = InsertCollection()
+    monkeypatch.setattr(connection, 'ensure_connection', lambda: None)
+    monkeypatch.setattr(connection, 'database', type('Database', (), {'collection': lambda self, name: collection})(),
+                        raising=False)
+    return collection
+
+
+def test_insert_partial_failure(insert_collection):
+    people = [Person(name='Foo', age=1), Person(name='Bar', age=2), Person(name='Spam', age=3)]
+    with pytest.raises(IntegrityError) as error:
+        Person.objects._insert(people, fields=[Person._meta.get_field('name')], return_id=True)
+    assert 'unique constraint violated' in str(error.value)
+    assert error.value.inserted_keys == ['1', '3']
+
+
+def test_insert_import(insert_collection):
+    people = [Person(_key='1', name='Foo', age=1), Person(_key='2', name='Bar', age=2)]
+    assert Person.objects.bulk_create(people, on_duplicate='replace') == people
+    assert insert_collection.imported == [{'_key': '1', 'name': 'Foo', 'age': 1},
+                                          {'_key': '2', 'name': 'Bar', 'age': 2}]
+    assert insert_collection.on_duplicate == ['replace']
+
+
+def test_insert_without_pk(insert_collection, monkeypatch):
+    monkeypatch.setattr(InsertCollection, 'insert_many', lambda self, documents: [{'_key': '7'}, {'_key': '8'}])
+    people = [Person(name='Foo', age=1), Person(name='Bar', age=2)]
+    Person.objects.bulk_create(people, on_duplicate='replace')
+    assert [person.pk for person in people] == ['7', '8']
+    # The policy only applies to the objects with a pk.
+    assert insert_collection.on_duplicate == []
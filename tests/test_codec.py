@@ -0,0 +1,56 @@
+import datetime
+import decimal
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from arangodb_driver.codec import CODECS, get_codec
+
+
+def available_codecs():
+    names = []
+    for name in sorted(CODECS):
+        try:
+            get_codec(name)
+        except ImproperlyConfigured:
+            continue
+        names.append(name)
+    return names
+
+
+@pytest.mark.parametrize('name', available_codecs())
+def test_round_trip(name):
+    codec = get_codec(name)
+    document = {'name': 'Bacon', 'age': 3, 'tags': ['a', 'b'], 'missing': None}
+    assert codec.loads(codec.dumps(document)) == document
+    assert codec.loads(codec.dumps(document).encode('utf-8')) == document
+
+
+@pytest.mark.parametrize('name', available_codecs())
+def test_extra_types(name):
+    codec = get_codec(name)
+    value = {
+        'price': decimal.Decimal('1.5'),
+        'day': datetime.date(2016, 10, 16),
+        'moment': datetime.datetime(2016, 10, 16, 12, 30),
+    }
+    assert codec.loads(codec.dumps(value)) == {'price': '1.5', 'day': '2016-10-16', 'moment': '2016-10-16T12:30:00'}
+
+
+@pytest.mark.parametrize('name', available_codecs())
+def test_decimal_precision(name):
+    codec = get_codec(name)
+    price = decimal.Decimal('0.1000000000000000055511151231257827')
+    assert decimal.Decimal(codec.loads(codec.dumps({'price': price}))['price']) == price
+
+
+@pytest.mark.parametrize('name', available_codecs())
+def test_invalid_document(name):
+    with pytest.raises(ValueError):
+        get_codec(name).loads(b'')
+
+
+def test_unknown_codec():
+    with pytest.raises(ImproperlyConfigured):
+        get_codec('pickle')
+    assert get_codec().name == 'json'
@@ -0,0 +1,82 @@
+import django
+import pytest
+from django.db.models import F
+
+django.setup()
+
+from arangodb_driver.compiler import SQLCompiler
+from arangodb_driver.models.fields import AutoField, CharField
+from arangodb_driver.models.models import VertexModel
+from sample_app.models import Person, Belongs
+
+
+class Singer(Person):
+    # A child model, its pk is the person_ptr_id attribute.
+    voice = CharField(max_length=20)
+
+    class Meta:
+        app_label = 'sample_app'
+
+
+class Tag(VertexModel):
+    _key = AutoField(primary_key=True, db_column='code')
+
+    class Meta:
+        app_label = 'sample_app'
+
+
+def compile_query(queryset):
+    return queryset.query.get_compiler(using=queryset.db).as_sql()
+
+
+def test_key_lookup_document():
+    sql, params = compile_query(Person.objects.filter(pk__in=['1', '2'], name='Foo'))
+    assert sql == 'FOR item IN DOCUMENT("sample_app_person", @p0) FILTER item.name == @p1 ' \
+                  'RETURN [item._key, item.name, item.age]'
+    assert params == (['1', '2'], 'Foo')
+
+
+@pytest.mark.parametrize('model, column', [(Singer, 'person_ptr_id'), (Tag, 'code')])
+def test_pk_lookup_not_on_key(model, column):
+    sql, params = compile_query(model.objects.filter(pk='1'))
+    assert sql.startswith('FOR item IN %s FILTER item.%s == @p0 ' % (model._meta.db_table, column))
+    assert 'DOCUMENT("%s"' % model._meta.db_table not in sql
+    assert params == ('1',)
+
+
+@pytest.mark.parametrize('lookups, sql, value', [
+    ({'_from__pk': '1'}, 'item._from == @p0', 'sample_app_person/1'),
+    ({'_from___key': '1'}, 'item._from == @p0', 'sample_app_person/1'),
+    ({'_from__pk__in': ['1', '2']}, 'item._from IN @p0', ['sample_app_person/1', 'sample_app_person/2']),
+    ({'_to__pk': '3'}, 'item._to == @p0', 'sample_app_group/3'),
+])
+def test_edge_field_pk_lookups(lookups, sql, value):
+    # The edges store the _id of the vertices, the keys are converted.
+    compiled, params = compile_query(Belongs.objects.filter(**lookups))
+    assert compiled.startswith('FOR item IN sample_app_belongs FILTER %s RETURN' % sql)
+    assert params == (value,)
+
+
+@pytest.mark.parametrize('queryset, sql, params', [
+    (Person.objects.annotate(x=F('age') + 1), 'FOR item IN sample_app_person ', ()),
+    (Person.objects.annotate(x=F('age') + 1).filter(x__gt=30),
+     'FOR item IN sample_app_person FILTER (item.age + @p0) > @p1 ', (1, 30)),
+])
+def test_count_annotated(queryset, sql, params, monkeypatch):
+    # The annotations the count doesn't read are dropped instead of grouping the documents by pk.
+    executed = []
+
+    def execute_sql(compiler, result_type=None, chunked_fetch=False):
+        executed.append(compiler.as_sql())
+        return [3]
+
+    monkeypatch.setattr(SQLCompiler, 'execute_sql', execute_sql)
+    assert queryset.count() == 3
+    assert executed == [(sql + 'COLLECT WITH COUNT INTO a0 RETURN [a0]', params)]
+
+
+def test_range_lookup():
+    sql, params = compile_query(Person.objects.filter(age__range=(20, 30)))
+    assert sql == 'FOR item IN sample_app_person FILTER (item.age >= @p0 AND item.age <= @p1) ' \
+                  'RETURN [item._key, item.name, item.age]'
+    assert params == (20, 30)
@@ -0,0 +1,161 @@
+import pytest
+from requests.exceptions import ConnectionError
+
+from arangodb_driver.cursor import ArangoCursor, OperationalError, bind_vars, is_read_only
+
+
+class FakeServerCursor(object):
+    """Behaves like python-arango's Cursor over a list of batches."""
+    def __init__(self, batches, stats=None):
+        self.batches = list(batches)
+        self.fetched = 1
+        self.closed = False
+        self._data = {'result': self.batches.pop(0), 'hasMore': bool(self.batches),
+                      'count': sum(len(b) for b in batches), 'extra': {'stats': stats or {}}}
+
+    def batch(self):
+        return self._data['result']
+
+    def has_more(self):
+        return self._data['hasMore']
+
+    def count(self):
+        return self._data['count']
+
+    def statistics(self):
+        stats = dict(self._data['extra']['stats'])
+        stats['modified'] = stats.pop('writesExecuted', None)
+        return stats
+
+    def next(self):
+        if not self.batch() and self.has_more():
+            self.fetched += 1
+            self._data['result'] = self.batches.pop(0)
+            self._data['hasMore'] = bool(self.batches)
+        elif not self.batch():
+            raise StopIteration
+        return self.batch().pop(0)
+
+    def close(self, ignore_missing=True):
+        self.closed = True
+
+
+class FakeAQL(object):
+    def __init__(self, server_cursor):
+        self.server_cursor = server_cursor
+        self.executed = []
+
+    def execute(self, query, **kwargs):
+        self.executed.append((query, kwargs))
+        if not kwargs.get('count'):
+            self.server_cursor._data['count'] = None
+        return self.server_cursor
+
+
+class FakeDatabase(object):
+    def __init__(self, server_cursor):
+        self.aql = FakeAQL(server_cursor)
+
+
+class LostAQL(object):
+    def execute(self, query, **kwargs):
+        raise ConnectionError('Connection reset by peer')
+
+
+class LostDatabase(object):
+    aql = LostAQL()
+
+
+def test_bind_vars():
+    assert bind_vars(['a', 1]) == {'p0': 'a', 'p1': 1}
+    assert bind_vars({'key': 'a'}) == {'key': 'a'}
+    assert bind_vars(None) is None
+
+
+def test_fetchmany_pulls_batches_lazily():
+    server_cursor = FakeServerCursor([[1, 2, 3], [4, 5, 6], [7]])
+    database = FakeDatabase(server_cursor)
+    cursor = ArangoCursor(database, batch_size=3)
+    cursor.execute('FOR item IN Person FILTER item.age == @p0 RETURN item', [31])
+    query, options = database.aql.executed[0]
+    assert options['bind_vars'] == {'p0': 31}
+    assert options['batch_size'] == 3
+    assert options['count'] is False
+    assert cursor.rowcount == -1
+    assert cursor.fetchmany(2) == [1, 2]
+    assert server_cursor.fetched == 1
+    assert cursor.fetchmany(2) == [3, 4]
+    assert server_cursor.fetched == 2
+    assert cursor.fetchone() == 5
+    assert cursor.fetchmany(10) == [6, 7]
+    assert cursor.fetchmany(10) == []
+    assert cursor.fetchone() is None
+
+
+def test_batches():
+    cursor = ArangoCursor(FakeDatabase(FakeServerCursor([[1, 2], [3, 4]])))
+    cursor.execute('FOR item IN Person RETURN item')
+    assert cursor.fetchone() == 1
+    assert list(cursor.batches()) == [[2], [3, 4]]
+
+
+def test_rowcount_from_count():
+    cursor = ArangoCursor(FakeDatabase(FakeServerCursor([[1, 2], [3]])), count=True)
+    cursor.execute('FOR item IN Person RETURN item')
+    assert cursor.rowcount == 3
+    # Without the count of the server, the results of a single batch are counted.
+    cursor = ArangoCursor(FakeDatabase(FakeServerCursor([[1, 2]])))
+    cursor.execute('FOR item IN Person RETURN item')
+    assert cursor.rowcount == 2
+
+
+def test_rowcount_from_stats():
+    cursor = ArangoCursor(FakeDatabase(FakeServerCursor([[]], stats={'writesExecuted': 12})))
+    cursor.execute('FOR item IN Person REMOVE item IN Person')
+    assert cursor.rowcount == 12
+
+
+def test_close_deletes_open_server_cursor():
+    server_cursor = FakeServerCursor([[1], [2]])
+    cursor = ArangoCursor(FakeDatabase(server_cursor))
+    cursor.execute('FOR item IN Person RETURN item')
+    cursor.fetchone()
+    cursor.close()
+    assert server_cursor.closed
+
+
+def test_close_exhausted_cursor_is_noop():
+    server_cursor = FakeServerCursor([[1]])
+    cursor = ArangoCursor(FakeDatabase(server_cursor))
+    cursor.execute('FOR item IN Person RETURN item')
+    cursor.close()
+    assert not server_cursor.closed
+
+
+def test_is_read_only():
+    assert is_read_only('FOR item IN Person FILTER item.update == @p0 RETURN [item._key]')
+    assert not is_read_only('FOR item IN @p0 INSERT item IN Person RETURN NEW._key')
+    assert not is_read_only('FOR item IN Person REMOVE item IN Person')
+    assert not is_read_only('for item in @p0 insert item into Person')
+    assert not is_read_only('FOR item IN Person Upsert {a: 1} INSERT {} UPDATE {} IN Person')
+    assert is_read_only('FOR item IN Person FILTER item.name == "update" OR item.`remove` RETURN item // insert')
+
+
+def test_no_reconnect_on_lowercase_writes():
+    cursor = ArangoCursor(LostDatabase(), reconnect=lambda: FakeDatabase(FakeServerCursor([[]])))
+    with pytest.raises(OperationalError):
+        cursor.execute('for item in Person update item with {age: 1} in Person')
+
+
+def test_reconnect_read_only():
+    database = FakeDatabase(FakeServerCursor([[1, 2]]))
+    cursor = ArangoCursor(LostDatabase(), reconnect=lambda: database)
+    cursor.execute('FOR item IN Person RETURN item')
+    assert cursor.fetchall() == [1, 2]
+    assert cursor.database is database
+
+
+def test_no_reconnect_on_writes():
+    cursor = ArangoCursor(LostDatabase(), reconnect=lambda: FakeDatabase(FakeServerCursor([[]])))
+    with pytest.raises(OperationalError):
+        cursor.execute('FOR item IN Person REMOVE item IN Person')
@@ -1,6 +1,7 @@
 # Pablo Carreira - 15/10/16
 import django
 import pytest
+from django.db.models import F, Max, Sum
 
 from arangodb_driver.models.aql.query import AQLQuerySet
 
@@ -20,6 +21,23 @@ def test_insert():
     assert joao.age == 35
 
 
+def test_bulk_create():
+    people = [Person(name='Bulk', age=age) for age in range(10)]
+    created = Person.objects.bulk_create(people, batch_size=3)
+    assert len(created) == 10
+    keys = [person.pk for person in created]
+    assert all(keys)
+    # The keys are in the order of the objects.
+    assert Person.objects.get(pk=keys[4]).age == 4
+
+
+def test_bulk_create_on_duplicate():
+    person = Person(name='Duplicated', age=1)
+    person.save()
+    Person.objects.bulk_create([Person(_key=person.pk, name='Duplicated', age=2)], on_duplicate='replace')
+    assert Person.objects.get(pk=person.pk).age == 2
+
+
 def test_get():
     bacon = Person(name='Bacon')
     bacon.save()
@@ -31,6 +49,38 @@ def test_get():
     assert bacon.name == 'Bacon'
 
 
+def test_save_existing():
+    bacon = Person(name='Bacon', age=20)
+    bacon.save()
+    bacon.age = 21
+    bacon.save()
+    assert Person.objects.get(pk=bacon.pk).age == 21
+
+
+def test_update_queryset():
+    person = Person(name='Updated', age=40)
+    person.save()
+    updated = Person.objects.filter(pk=person.pk).update(age=F('age') + 1)
+    assert updated == 1
+    assert Person.objects.get(pk=person.pk).age == 41
+
+
+def test_bulk_update():
+    people = Person.objects.bulk_create([Person(name='BulkUpdate', age=age) for age in range(5)])
+    for person in people:
+        person.age += 100
+    assert Person.objects.bulk_update(people, ['age']) == 5
+    assert Person.objects.get(pk=people[0].pk).age == 100
+
+
+def test_in_bulk():
+    people = Person.objects.bulk_create([Person(name='InBulk', age=age) for age in range(3)])
+    keys = [person.pk for person in people]
+    found = Person.objects.in_bulk(keys)
+    assert sorted(found) == sorted(keys)
+    assert len(Person.objects.filter(pk=keys[0], age=1)) == 0
+
+
 def test_filter_simple():
     # TODO: Move to test setup.
     # Person(name='Eggs', age=30).save()
@@ -62,6 +112,65 @@ def test_filter_chaining():
         print(item.name)
 
 
+def test_filter_in():
+    queryset = Person.objects.filter(name__in=['Eggs', 'Bacon'])
+    assert len(queryset) >= len(Person.objects.filter(name='Eggs'))
+
+
+def test_filter_batch_size():
+    # Each document comes in its own batch, all of them must be fetched.
+    queryset = Person.objects.filter(name='Eggs').batch_size(1)
+    assert isinstance(queryset, AQLQuerySet)
+    assert len(queryset) == len(Person.objects.filter(name='Eggs'))
+
+
+def test_count():
+    queryset = Person.objects.filter(name='Eggs')
+    assert queryset.count() == len(queryset)
+    assert Person.objects.filter(name='Eggs')[:1].count() <= 1
+
+
+def test_exists():
+    assert Person.objects.filter(name='Eggs').exists()
+    assert not Person.objects.filter(name='Nobody has this name').exists()
+
+
+def test_aggregate():
+    Person.objects.bulk_create([Person(name='Aggregated', age=age) for age in (1, 2, 3)])
+    result = Person.objects.filter(name='Aggregated').aggregate(Sum('age'), Max('age'))
+    assert result['age__max'] == 3
+    assert result['age__sum'] % 6 == 0
+
+
+def test_order_by_slice():
+    Person.objects.bulk_create([Person(name='Paged', age=age) for age in range(10)])
+    queryset = Person.objects.filter(name='Paged').order_by('-age', '_key')
+    ages = [person.age for person in queryset]
+    assert ages == sorted(ages, reverse=True)
+    page = [person.age for person in queryset[2:5]]
+    assert page == ages[2:5]
+    assert [person.age for person in queryset[3:]] == ages[3:]
+    assert len(Person.objects.filter(name='Paged').order_by('?')[:4]) == 4
+
+
+def test_values():
+    Person(name='Projected', age=7).save()
+    queryset = Person.objects.filter(name='Projected')
+    assert (('Projected', 7) in queryset.values_list('name', 'age'))
+    assert {'age': 7} in queryset.values('age')
+    assert 7 in queryset.values_list('age', flat=True)
+
+
+def test_only_defer():
+    Person(name='Projected', age=7).save()
+    person = Person.objects.filter(name='Projected').only('name')[0]
+    assert person.get_deferred_fields() == {'age'}
+    # The deferred field is loaded on access.
+    assert person.age == 7
+    person = Person.objects.filter(name='Projected').defer('name')[0]
+    assert person.get_deferred_fields() == {'name'}
+
+
 def test_delete_model():
     queryset = Person.objects.filter(name='Eggs', age=31)
     len_a = len(queryset)
@@ -0,0 +1,69 @@
+import django
+import pytest
+from django.db import connection
+
+django.setup()
+
+from arangodb_driver.cursor import interpolate
+from sample_app.models import Person
+
+PLAN = {
+    'nodes': [
+        {'type': 'SingletonNode', 'id': 1, 'estimatedCost': 1},
+        {'type': 'IndexNode', 'id': 6, 'collection': 'sample_app_person', 'indexes': [
+            {'id': '1234', 'name': 'sample_app_person_name_idx', 'type': 'persistent', 'fields': ['name'],
+             'unique': False, 'sparse': False}]},
+        {'type': 'EnumerateCollectionNode', 'id': 2, 'collection': 'sample_app_group'},
+        {'type': 'ReturnNode', 'id': 5},
+    ],
+    'rules': ['use-indexes', 'remove-unnecessary-calculations'],
+    'estimatedCost': 12.5,
+    'estimatedNrItems': 3,
+}
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    sent = []
+
+    def api(method, endpoint, data=None, params=None):
+        sent.append((method, endpoint, data, params))
+        if data['options']['allPlans']:
+            return {'plans': [PLAN, PLAN], 'warnings': []}
+        return {'plan': PLAN, 'warnings': [{'code': 1562, 'message': 'division by zero'}], 'cacheable': True}
+    monkeypatch.setattr(connection, 'api', api, raising=False)
+    return sent
+
+
+def test_str_query():
+    queryset = Person.objects.filter(name='Foo "Bar"', age__gte=30)
+    assert str(queryset.query) == ('FOR item IN sample_app_person FILTER (item.name == "Foo \\"Bar\\"" '
+                                   'AND item.age >= 30) RETURN [item._key, item.name, item.age]')
+
+
+def test_interpolate():
+    assert interpolate('FOR item IN @@collection FILTER item.a == @p0 AND item.b IN @p1 RETURN item',
+                       ['x', [1, 2]]) == 'FOR item IN @@collection FILTER item.a == "x" AND item.b IN [1, 2] RETURN item'
+
+
+def test_explain(requests):
+    plan = Person.objects.filter(name='Foo').explain(optimizer_rules=['-all', '+use-indexes'])
+    method, endpoint, data, params = requests[0]
+    assert (method, endpoint) == ('post', '/_api/explain')
+    assert data['query'] == 'FOR item IN sample_app_person FILTER item.name == @p0 RETURN [item._key, item.name, item.age]'
+    assert data['bindVars'] == {'p0': 'Foo'}
+    assert data['options'] == {'allPlans': False, 'optimizer': {'rules': ['-all', '+use-indexes']}}
+    assert plan.estimated_cost == 12.5
+    assert plan.estimated_items == 3
+    assert plan.indexes == [{'collection': 'sample_app_person', 'name': 'sample_app_person_name_idx',
+                             'type': 'persistent', 'fields': ['name'], 'unique': False, 'sparse': False}]
+    assert plan.full_scans == ['sample_app_group']
+    assert plan.warnings == ['division by zero', 'Full scan of the collection "sample_app_group", no index is used.']
+    assert plan.cacheable is True
+
+
+def test_explain_all_plans(requests):
+    plans = Person.objects.all().explain(all_plans=True, max_plans=2)
+    assert requests[0][2]['options'] == {'allPlans': True, 'maxNumberOfPlans': 2}
+    assert len(plans) == 2
+    assert plans[0].full_scans == ['sample_app_group']
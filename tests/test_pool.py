@@ -0,0 +1,80 @@
+from arangodb_driver.pool import ConnectionPool, PoolKey, PooledConnection
+
+KEY = PoolKey('http', 'localhost', 8529, 'root', '', 'teste_python', 'json')
+
+
+class FakeDatabase(object):
+    def __init__(self, alive=True):
+        self.alive = alive
+
+    def verify(self):
+        if not self.alive:
+            raise ConnectionError()
+        return True
+
+
+class FakeHTTPClient(object):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.http_client = FakeHTTPClient()
+
+
+def factory(alive=True):
+    return lambda: PooledConnection(KEY, FakeClient(), FakeDatabase(alive))
+
+
+def test_reuses_released_connection():
+    pool = ConnectionPool()
+    conn = pool.acquire(KEY, factory())
+    pool.release(conn)
+    assert len(pool) == 1
+    assert pool.acquire(KEY, factory()) is conn
+    assert len(pool) == 0
+
+
+def test_max_size():
+    pool = ConnectionPool()
+    first, second = pool.acquire(KEY, factory()), pool.acquire(KEY, factory())
+    pool.release(first, max_size=1)
+    pool.release(second, max_size=1)
+    assert len(pool) == 1
+    assert second.client.http_client.closed
+
+
+def test_idle_connections_are_evicted():
+    pool = ConnectionPool()
+    conn = pool.acquire(KEY, factory())
+    pool.release(conn)
+    conn.released_at -= 100
+    assert pool.acquire(KEY, factory(), max_idle=10) is not conn
+    assert conn.client.http_client.closed
+
+
+def test_dead_connections_are_discarded():
+    pool = ConnectionPool()
+    conn = pool.acquire(KEY, factory(alive=False))
+    pool.release(conn)
+    conn.released_at -= 20
+    assert pool.acquire(KEY, factory(), check_after=10) is not conn
+    assert conn.client.http_client.closed
+
+
+def test_last_check_survives_checkout():
+    pool = ConnectionPool()
+    conn = pool.acquire(KEY, factory())
+    assert conn.checked_at is None
+    pool.release(conn)
+    conn.released_at -= 20
+    assert pool.acquire(KEY, factory(), check_after=10) is conn
+    checked_at = conn.checked_at
+    assert checked_at is not None
+    pool.release(conn)
+    # A recently released connection isn't verified again, its last check is kept.
+    assert pool.acquire(KEY, factory(), check_after=10) is conn
+    assert conn.checked_at == checked_at
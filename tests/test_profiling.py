@@ -0,0 +1,93 @@
+import django
+import pytest
+from django.db import connection
+from django.test.utils import override_settings
+
+django.setup()
+
+from arangodb_driver.profiling import ProfilingCursorWrapper, query_executed
+
+STATS = {'writesExecuted': 0, 'scannedFull': 120, 'scannedIndex': 0, 'executionTime': 0.0042,
+         'peakMemoryUsage': 32768}
+
+
+class StatsCursor(object):
+    """A cursor whose queries return one row, with the statistics of STATS."""
+    def __init__(self):
+        self.rowcount = -1
+        self.stats = {}
+
+    def execute(self, aql, params=None):
+        self.stats, self.rowcount = STATS, 1
+
+
+@pytest.fixture
+def cursor():
+    connection.queries_log.clear()
+    return ProfilingCursorWrapper(StatsCursor(), connection)
+
+
+@pytest.fixture
+def no_debug():
+    with override_settings(DEBUG=False):
+        yield
+
+
+@pytest.fixture
+def received():
+    received = []
+
+    def receiver(sender, connection, query, **kwargs):
+        received.append(query)
+    query_executed.connect(receiver)
+    yield received
+    query_executed.disconnect(receiver)
+
+
+def test_queries_log(cursor, monkeypatch):
+    monkeypatch.setattr(connection, 'force_debug_cursor', True)
+    cursor.execute('FOR item IN sample_app_person FILTER item.name == @p0 RETURN item', ['Foo'])
+    query, = connection.queries
+    assert query['sql'] == 'FOR item IN sample_app_person FILTER item.name == "Foo" RETURN item'
+    assert query['aql'] == 'FOR item IN sample_app_person FILTER item.name == @p0 RETURN item'
+    assert query['bind_vars'] == {'p0': 'Foo'}
+    assert query['rowcount'] == 1
+    assert query['stats']['scannedFull'] == 120
+    assert query['stats']['peakMemoryUsage'] == 32768
+    assert float(query['time']) >= 0
+
+
+def test_query_executed_without_debug(cursor, received, no_debug):
+    assert not connection.queries_logged
+    cursor.execute('FOR item IN sample_app_person RETURN item')
+    assert len(received) == 1
+    assert received[0]['stats']['executionTime'] == 0.0042
+    assert not connection.queries_log
+
+
+def test_sql_built_when_read(cursor, received, no_debug):
+    cursor.execute('FOR item IN sample_app_person FILTER item.name == @p0 RETURN item', ['Foo'])
+    query, = received
+    assert 'sql' not in query
+    assert query['sql'] == 'FOR item IN sample_app_person FILTER item.name == "Foo" RETURN item'
+    assert 'sql' in query
+
+
+def test_not_profiled(cursor, no_debug):
+    cursor.execute('FOR item IN sample_app_person RETURN item')
+    assert not connection.queries_log
+
+
+def test_last_executed_query():
+    assert connection.ops.last_executed_query(None, 'RETURN @p0', ('a',)) == 'RETURN "a"'
+
+
+def test_watchdog(cursor, no_debug, monkeypatch):
+    checked = []
+
+    class Watchdog(object):
+        def check(self, query, duration):
+            checked.append(query)
+    monkeypatch.setattr(connection, 'watchdog', Watchdog())
+    cursor.execute('FOR item IN sample_app_person RETURN item')
+    assert checked[0]['stats']['scannedFull'] == 120
@@ -0,0 +1,28 @@
+from arangodb_driver.querycache import AQLCache
+
+
+def test_cache_hits_and_misses():
+    cache = AQLCache(maxsize=2)
+    assert cache.get('a') is None
+    cache.set('a', 'FOR item IN Person RETURN item')
+    assert cache.get('a') == 'FOR item IN Person RETURN item'
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AQLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_cache_disabled():
+    cache = AQLCache(maxsize=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
@@ -1,29 +1,40 @@
 # Pablo Carreira - 15/10/16
 import django
 import pytest
+from django.db import connection
+from django.db.models import Q, Count, Max, prefetch_related_objects
+
+from arangodb_driver.compiler import SQLCompiler
 
 from arangodb_driver.models.aql.query import AQLQuerySet
+from arangodb_driver.models.aql.traversal import model_for_collection
 
 django.setup()
 
-from sample_app.models import Person, Group
-
+from sample_app.models import Person, Group, Belongs
 
-@pytest.mark.skip(reason="not implemented yet")
-def test_insert():
-    joao = Person(name='Foo', age=35)
-    joao.save()
-    group1 = Group(name='Rock Band')
-    group1.save()
 
+def test_insert(statements, monkeypatch):
+    # The links of joao.groups are Belongs edges (see test_many_to_many_all and test_many_to_many_add_remove).
+    joao = Person(_key='1', name='Foo', age=35)
+    group1 = Group(_key='2', name='Rock Band')
     joao.groups.add(group1)
+    (sql, params), = statements
+    assert sql == 'FOR item IN @p0 UPSERT {_from: item._from, _to: item._to} INSERT item UPDATE {} IN sample_app_belongs'
+    assert params == [[{'_from': 'sample_app_person/1', '_to': 'sample_app_group/2'}]]
 
-    print("Group:")
-    j_groups = joao.groups.all()
-    for item in j_groups:
-        print(item.name)
+    executed = []
 
+    def execute_sql(compiler, result_type=None, chunked_fetch=False):
+        executed.append(compiler.as_sql())
+        return iter([[['2', 'Rock Band']]])
 
+    monkeypatch.setattr(SQLCompiler, 'execute_sql', execute_sql)
+    j_groups = joao.groups.all()
+    assert [(item.pk, item.name) for item in j_groups] == [('2', 'Rock Band')]
+    (sql, params), = executed
+    assert sql.startswith('FOR item, edge, path IN 1..1 OUTBOUND @p0 sample_app_belongs ')
+    assert params == ('sample_app_person/1',)
 
 
 @pytest.mark.skip(reason="not implemented yet")
@@ -99,5 +110,202 @@ def test_bulk_delete():
     pass
 
 
+def test_traverse_aql():
+    person = Person(_key='1', name='Foo', age=35)
+    queryset = Group.objects.traverse(person, Belongs, max_depth=2).filter(name='Rock Band')
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    assert sql == ('FOR item, edge, path IN 1..2 OUTBOUND @p0 sample_app_belongs '
+                   'FILTER IS_SAME_COLLECTION("sample_app_group", item) '
+                   'FILTER item.name == @p1 RETURN [item._key, item.name]')
+    assert params == ('sample_app_person/1', 'Rock Band')
+
+
+def test_traverse_options():
+    queryset = Group.objects.traverse('sample_app_person/1', Belongs, 'any', 0, 3, prune=Q(name='Rock Band'),
+                                      unique_vertices='global', bfs=True, edges=True)
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    assert sql == ('FOR item, edge, path IN 0..3 ANY @p0 sample_app_belongs PRUNE item.name == @p1 '
+                   'OPTIONS {"uniqueVertices": "global", "bfs": true} '
+                   'FILTER IS_SAME_COLLECTION("sample_app_group", item) RETURN [item._key, item.name, edge]')
+    assert params == ('sample_app_person/1', 'Rock Band')
+    with pytest.raises(ValueError):
+        Group.objects.traverse('sample_app_person/1', Belongs, unique_vertices='global')
+    with pytest.raises(ValueError):
+        Group.objects.traverse('sample_app_person/1', Belongs, direction='up')
+
+
+def test_traverse_graph():
+    queryset = Group.objects.traverse('sample_app_person/1', graph='sample_app', direction='any', max_depth=3,
+                                      prune=Q(name='Rock Band'))
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    assert sql == ('FOR item, edge, path IN 1..3 ANY @p0 GRAPH @p1 PRUNE item.name == @p2 '
+                   'FILTER IS_SAME_COLLECTION("sample_app_group", item) RETURN [item._key, item.name]')
+    assert params == ('sample_app_person/1', 'sample_app', 'Rock Band')
+    with pytest.raises(ValueError):
+        Group.objects.traverse('sample_app_person/1')
+    with pytest.raises(ValueError):
+        Group.objects.traverse('sample_app_person/1', Belongs, graph='sample_app')
+
+
+def test_traverse_edges():
+    queryset = Group.objects.traverse('sample_app_person/1', Belongs, edges=True)
+    queryset.query.fetched_batches = [[['2', 'Rock Band', {'_id': 'sample_app_belongs/3', '_key': '3',
+                                                           'join_date': '2016-10-15'}]]]
+    group, = queryset
+    assert group.name == 'Rock Band'
+    assert isinstance(group.edge, Belongs)
+    assert group.edge.pk == '3'
+
+
+class RecordingCursor(object):
+    """Records the executed statements instead of sending them."""
+    rowcount = 1
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    statements = []
+    monkeypatch.setattr(connection, 'cursor', lambda: RecordingCursor(statements))
+    return statements
+
+
+def test_many_to_many_all():
+    person = Person(_key='1', name='Foo', age=35)
+    sql, params = person.groups.all().query.get_compiler(using='default').as_sql()
+    assert sql.startswith('FOR item, edge, path IN 1..1 OUTBOUND @p0 sample_app_belongs ')
+    assert params == ('sample_app_person/1',)
+    group = Group(_key='2', name='Rock Band')
+    sql, params = group.person_set.all().query.get_compiler(using='default').as_sql()
+    assert sql.startswith('FOR item, edge, path IN 1..1 INBOUND @p0 sample_app_belongs ')
+    assert params == ('sample_app_group/2',)
+
+
+def test_many_to_many_add_remove(statements):
+    person = Person(_key='1', name='Foo', age=35)
+    person.groups.add(Group(_key='2', name='Rock Band'), '3')
+    person.groups.remove('3')
+    assert len(statements) == 2
+    (add_sql, add_params), (remove_sql, remove_params) = statements
+    assert 'UPSERT' in add_sql
+    assert add_params == [[{'_from': 'sample_app_person/1', '_to': 'sample_app_group/2'},
+                           {'_from': 'sample_app_person/1', '_to': 'sample_app_group/3'}]]
+    assert 'REMOVE' in remove_sql
+    assert remove_params == ['sample_app_person/1', ['sample_app_group/3']]
+
+
+def test_prefetch_many_to_many(monkeypatch):
+    people = [Person(_key='1', name='Foo', age=35), Person(_key='2', name='Bar', age=36)]
+    executed = []
+
+    def execute_sql(compiler, result_type=None, chunked_fetch=False):
+        executed.append(compiler.as_sql())
+        return iter([[['3', 'Rock Band', 'sample_app_person/1'], ['3', 'Rock Band', 'sample_app_person/2'],
+                      ['4', 'Jazz Band', 'sample_app_person/2']]])
+
+    monkeypatch.setattr(SQLCompiler, 'execute_sql', execute_sql)
+    prefetch_related_objects(people, 'groups')
+    sql, params = executed[0]
+    assert sql.startswith('FOR start IN @p0 FOR item, edge, path IN 1..1 OUTBOUND start sample_app_belongs ')
+    assert params == (['sample_app_person/1', 'sample_app_person/2'],)
+    assert [group.name for group in people[0].groups.all()] == ['Rock Band']
+    assert [group.name for group in people[1].groups.all()] == ['Rock Band', 'Jazz Band']
+    assert len(executed) == 1
+
+
+def test_edge_fields():
+    queryset = Belongs.objects.filter(_from__in=[Person(_key='1'), Person(_key='2')])
+    sql, params = queryset.query.get_compiler(using='default').as_sql()
+    assert sql == 'FOR item IN sample_app_belongs FILTER item._from IN @p0 ' \
+                  'RETURN [item._key, item._from, item._to, item.join_date]'
+    assert params == (['sample_app_person/1', 'sample_app_person/2'],)
+    queryset = Belongs.objects.all()
+    queryset.query.fetched_batches = [[['5', 'sample_app_person/1', 'sample_app_group/3', '2016-10-15']]]
+    edge, = queryset
+    assert (edge._from_id, edge._to_id) == ('1', '3')
+
+
+def test_select_related():
+    queryset = Belongs.objects.select_related('_from').filter(join_date='2016-10-15')
+    sql, params = queryset.query.get_compiler(using='default').as_sql()
+    assert sql == ('FOR item IN sample_app_belongs FILTER item.join_date == @p0 '
+                   'LET rel1 = DOCUMENT("sample_app_person", item._from) '
+                   'RETURN [item._key, item._from, item._to, item.join_date, rel1._key, rel1.name, rel1.age]')
+    queryset.query.fetched_batches = [[['5', 'sample_app_person/1', 'sample_app_group/3', '2016-10-15',
+                                        '1', 'Foo', 35]]]
+    edge, = queryset
+    assert edge._from.name == 'Foo'
+    assert edge._from.pk == '1'
+
+
+def test_filter_on_related():
+    queryset = Belongs.objects.filter(_from__name='Foo')
+    sql, params = queryset.query.get_compiler(using='default').as_sql()
+    assert sql == ('FOR item IN sample_app_belongs LET rel1 = DOCUMENT("sample_app_person", item._from) '
+                   'FILTER rel1.name == @p0 RETURN [item._key, item._from, item._to, item.join_date]')
+    assert params == ('Foo',)
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Records the AQL of the executed queries, that return a single row with 7."""
+    compiled = []
+
+    def execute_sql(self, result_type='multi', chunked_fetch=False):
+        compiled.append(self.as_sql())
+        return [7]
+    monkeypatch.setattr(SQLCompiler, 'execute_sql', execute_sql)
+    return compiled
+
+
+def test_aggregate_on_related(compiled):
+    assert Belongs.objects.aggregate(oldest=Max('_from__age')) == {'oldest': 7}
+    assert compiled == [('FOR item IN sample_app_belongs LET rel1 = DOCUMENT("sample_app_person", item._from) '
+                         'COLLECT AGGREGATE a0 = MAX(rel1.age) RETURN [a0]', ())]
+
+
+def test_group_by_related():
+    queryset = Belongs.objects.values('_from__name').annotate(n=Count('_key')).filter(n__gt=2).order_by('-n')[:5]
+    sql, params = queryset.query.get_compiler(using='default').as_sql()
+    assert sql == ('FOR item IN sample_app_belongs LET rel1 = DOCUMENT("sample_app_person", item._from) '
+                   'COLLECT g0 = rel1.name AGGREGATE a0 = SUM(item._key == null ? 0 : 1) '
+                   'FILTER a0 > @p0 SORT a0 DESC LIMIT @p1 RETURN [g0, a0]')
+    assert params == (2, 5)
+    queryset.query.fetched_batches = [[['Foo', 3]]]
+    assert list(queryset) == [{'_from__name': 'Foo', 'n': 3}]
+
+
+def test_traverse_count(compiled):
+    queryset = Group.objects.traverse('sample_app_person/1', Belongs, edges=True, paths=True)
+    assert queryset.count() == 7
+    assert queryset[:10].count() == 7
+    sql, params = compiled[0]
+    assert sql == ('FOR item, edge, path IN 1..1 OUTBOUND @p0 sample_app_belongs '
+                   'FILTER IS_SAME_COLLECTION("sample_app_group", item) COLLECT WITH COUNT INTO a0 RETURN [a0]')
+    assert params == ('sample_app_person/1',)
+    assert 'GROUP BY' not in compiled[1][0]
+    # The queryset keeps its annotations.
+    assert set(queryset.query.annotations) == {'edge', 'path'}
+
+
+def test_model_for_collection():
+    assert model_for_collection('sample_app_belongs') is Belongs
+    assert model_for_collection('unknown') is None
+
+
 if __name__ == '__main__':
-    test_insert()
\ No newline at end of file
+    pytest.main([__file__])
@@ -0,0 +1,222 @@
+import django
+import pytest
+from django.db import connection, models
+from django.db.migrations.loader import MigrationLoader
+
+django.setup()
+
+from arangodb_driver.models.fields import CharField, ManyToMany
+from arangodb_driver.models.indexes import PersistentIndex, HashIndex, TTLIndex, GeoIndex
+from arangodb_driver.models.models import VertexModel
+from arangodb_driver.schema import is_edge_model
+from sample_app.models import Person, Group, Belongs
+
+
+class Sensor(VertexModel):
+    serial = CharField(max_length=20, unique=True, null=True)
+    room = CharField(max_length=20, db_index=True)
+    floor = models.IntegerField()
+    read_at = models.DateTimeField()
+    location = models.TextField()
+
+    class Meta:
+        app_label = 'sample_app'
+        unique_together = [('room', 'floor')]
+        indexes = [
+            HashIndex(fields=['floor'], name='sensor_floor_hix'),
+            TTLIndex(fields=['read_at'], name='sensor_read_at_tix', expire_after=3600),
+            GeoIndex(fields=['location'], name='sensor_location_gix', geo_json=True),
+            models.Index(fields=['room', 'floor'], name='sensor_room_floor_idx'),
+        ]
+
+
+class Band(VertexModel):
+    # The intermediary model is created by Django.
+    members = ManyToMany(Person, related_name='bands')
+
+    class Meta:
+        app_label = 'sample_app'
+
+
+# The answers of the fake HTTP API to the GET requests, by endpoint.
+RESPONSES = {
+    '/_api/index': {'indexes': [
+        {'id': 'sensor/0', 'type': 'primary', 'fields': ['_key'], 'unique': True, 'sparse': False},
+        {'id': 'sensor/12', 'name': 'sensor_floor_hix', 'type': 'hash', 'fields': ['floor'],
+         'unique': False, 'sparse': False},
+    ]},
+    '/_api/gharial': {'graphs': []},
+}
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """Records the requests sent to the HTTP API, the GETs are answered from RESPONSES."""
+    sent = []
+
+    def api(method, endpoint, data=None, params=None):
+        sent.append((method, endpoint, data, params))
+        if method == 'get':
+            return RESPONSES[endpoint]
+        return {}
+    monkeypatch.setattr(connection, 'api', api, raising=False)
+    return sent
+
+
+@pytest.fixture
+def collections(monkeypatch, requests):
+    """Records the collections created, by name: True for the edge collections."""
+    created = {}
+
+    class Database(object):
+        def create_collection(self, name, edge=False):
+            created[name] = edge
+
+        def delete_collection(self, name, ignore_missing=False):
+            created.pop(name, None)
+    monkeypatch.setattr(connection, 'database', Database(), raising=False)
+    return created
+
+
+def test_model_index_options():
+    editor = connection.schema_editor()
+    options = editor.get_model_index_options(Sensor)
+    by_name = {option['name']: option for option in options}
+    serial = [option for option in options if option['fields'] == ['serial']][0]
+    assert serial['unique'] is True
+    assert serial['sparse'] is True
+    room = [option for option in options if option['fields'] == ['room']][0]
+    assert room['type'] == 'persistent'
+    assert 'unique' not in room
+    together = [option for option in options if option['fields'] == ['room', 'floor'] and option.get('unique')]
+    assert len(together) == 1
+    assert by_name['sensor_floor_hix'] == {'type': 'hash', 'fields': ['floor'], 'name': 'sensor_floor_hix'}
+    assert by_name['sensor_read_at_tix']['expireAfter'] == 3600
+    assert by_name['sensor_location_gix']['geoJson'] is True
+    assert by_name['sensor_room_floor_idx']['type'] == 'persistent'
+    # The key has an index of its own.
+    assert not [option for option in options if option['fields'] == ['_key']]
+
+
+def test_edge_fields_not_indexed():
+    editor = connection.schema_editor()
+    options = editor.get_model_index_options(Belongs)
+    assert not [option for option in options if set(option['fields']) & {'_from', '_to'}]
+
+
+def test_ttl_index_single_field():
+    with pytest.raises(ValueError):
+        TTLIndex(fields=['read_at', 'floor'], name='sensor_ttl_tix')
+
+
+def test_index_deconstruct():
+    index = PersistentIndex(fields=['room'], name='sensor_room_pix', unique=True, sparse=True)
+    path, args, kwargs = index.deconstruct()
+    assert path == 'arangodb_driver.models.indexes.PersistentIndex'
+    assert kwargs == {'fields': ['room'], 'name': 'sensor_room_pix', 'unique': True, 'sparse': True}
+
+
+def test_get_constraints(requests):
+    constraints = connection.introspection.get_constraints(None, 'sensor')
+    assert requests == [('get', '/_api/index', None, {'collection': 'sensor'})]
+    assert constraints['sensor/0']['primary_key'] is True
+    floor = constraints['sensor_floor_hix']
+    assert floor['columns'] == ['floor']
+    assert floor['type'] == 'hash'
+    assert floor['index'] is True
+    assert floor['unique'] is False
+
+
+def test_add_remove_index(requests):
+    editor = connection.schema_editor()
+    index = HashIndex(fields=['floor'], name='sensor_floor_hix')
+    editor.add_index(Sensor, index)
+    assert requests[-1] == ('post', '/_api/index', {'type': 'hash', 'fields': ['floor'], 'name': 'sensor_floor_hix'},
+                            {'collection': Sensor._meta.db_table})
+    editor.remove_index(Sensor, index)
+    assert requests[-1] == ('delete', '/_api/index/sensor/12', None, None)
+    del requests[:]
+    editor.remove_index(Sensor, HashIndex(fields=['room'], name='sensor_missing_hix'))
+    assert [request[0] for request in requests] == ['get']
+
+
+def test_alter_field_indexes(requests):
+    editor = connection.schema_editor()
+    old_field = Person._meta.get_field('name')
+    new_field = CharField(max_length=150, db_index=True)
+    new_field.set_attributes_from_name('name')
+    new_field.model = Person
+    editor.alter_field(Person, old_field, new_field)
+    assert len(requests) == 1
+    method, endpoint, data, params = requests[0]
+    assert (method, endpoint, params) == ('post', '/_api/index', {'collection': Person._meta.db_table})
+    assert data['fields'] == ['name']
+    # Back to no index: the index is dropped (it isn't listed, so nothing is deleted).
+    del requests[:]
+    editor.alter_field(Person, new_field, old_field)
+    assert [request[0] for request in requests] == ['get']
+
+
+BELONGS_DEFINITION = {'collection': 'sample_app_belongs', 'from': ['sample_app_person'], 'to': ['sample_app_group']}
+
+
+def test_edge_definition():
+    editor = connection.schema_editor()
+    assert editor.get_edge_definition(Belongs) == BELONGS_DEFINITION
+    assert editor.get_edge_definition(Person) is None
+
+
+def test_create_graph(requests):
+    editor = connection.schema_editor()
+    editor.add_edge_definition(Belongs)
+    assert requests[-1] == ('post', '/_api/gharial', {'name': 'sample_app', 'edgeDefinitions': [BELONGS_DEFINITION]},
+                            None)
+
+
+def test_add_edge_definition(requests, monkeypatch):
+    graph = {'_key': 'sample_app', 'edgeDefinitions': [
+        {'collection': 'sample_app_likes', 'from': ['sample_app_person'], 'to': ['sample_app_person']}]}
+    monkeypatch.setitem(RESPONSES, '/_api/gharial', {'graphs': [graph]})
+    editor = connection.schema_editor()
+    editor.add_edge_definition(Belongs)
+    assert requests[-1] == ('post', '/_api/gharial/sample_app/edge', BELONGS_DEFINITION, None)
+
+    # Already in the graph, as it is: nothing to do.
+    graph['edgeDefinitions'].append(BELONGS_DEFINITION)
+    del requests[:]
+    editor.add_edge_definition(Belongs)
+    assert [request[0] for request in requests] == ['get']
+
+    editor.remove_edge_definition(Belongs)
+    assert requests[-1] == ('delete', '/_api/gharial/sample_app/edge/sample_app_belongs', None,
+                            {'dropCollections': 'false'})
+
+
+def test_edge_model_is_the_through_model(collections):
+    field = Person._meta.get_field('groups')
+    assert field.remote_field.through is Belongs
+    assert field.edge_collection == 'sample_app_belongs'
+    assert field.deconstruct()[3] == {'to': 'sample_app.Group', 'edge_model': 'sample_app.Belongs'}
+    editor = connection.schema_editor()
+    editor.add_field(Person, field)
+    editor.create_model(Person)
+    assert collections == {'sample_app_person': False}
+
+
+def test_auto_created_edge_collection(collections):
+    editor = connection.schema_editor()
+    editor.create_model(Band)
+    assert collections == {'sample_app_band': False, 'sample_app_band_members': True}
+    editor.remove_field(Band, Band._meta.get_field('members'))
+    assert collections == {'sample_app_band': False}
+    editor.add_field(Band, Band._meta.get_field('members'))
+    assert collections == {'sample_app_band': False, 'sample_app_band_members': True}
+    editor.delete_model(Band)
+    assert collections == {}
+
+
+def test_edge_model_of_migrations():
+    # The models of the migrations don't have model_type, only the fields.
+    apps = MigrationLoader(None).project_state(('sample_app', '0002_groups')).apps
+    assert is_edge_model(apps.get_model('sample_app', 'Belongs'))
+    assert not is_edge_model(apps.get_model('sample_app', 'Person'))
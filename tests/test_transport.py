@@ -0,0 +1,118 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from arangodb_driver.codec import get_codec
+from arangodb_driver.transport import LoadBalancingHTTPClient
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """Answers with the port of the server, cursors are created with one more batch."""
+
+    def reply(self, body):
+        port = self.server.server_address[1]
+        data = json.dumps(dict(body, port=port)).encode('utf-8')
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.reply({'version': '3.0'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.reply({'id': 'cursor%d' % self.server.server_address[1], 'hasMore': True, 'result': [1]})
+
+    def do_PUT(self):
+        self.reply({'id': self.path.rsplit('/', 1)[-1], 'hasMore': False, 'result': [2]})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def ports():
+    servers = [ThreadingHTTPServer(('127.0.0.1', 0), CoordinatorHandler) for _ in range(3)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield [server.server_address[1] for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def dead_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def make_client(ports, **kwargs):
+    return LoadBalancingHTTPClient(get_codec(), ['127.0.0.1:%d' % port for port in ports], **kwargs)
+
+
+def test_round_robin(ports):
+    client = make_client(ports)
+    answered = [client.get('http://localhost:8529/_db/test/_api/version').body['port'] for _ in range(6)]
+    assert answered == ports + ports
+
+
+def test_least_outstanding(ports):
+    client = make_client(ports, strategy='least_outstanding')
+    client.coordinators[0].outstanding = 2
+    client.coordinators[1].outstanding = 1
+    assert client.get('http://localhost:8529/_db/test/_api/version').body['port'] == ports[2]
+
+
+def test_reads_fail_over(ports, dead_port):
+    client = make_client([dead_port] + ports, threshold=2)
+    # The dead coordinator is the first choice of one request out of four.
+    for _ in range(8):
+        assert client.get('http://localhost:8529/_db/test/_api/version').body['port'] in ports
+    assert client.coordinators[0].breaker.opened_at is not None
+    query = json.dumps({'query': 'FOR item IN Person RETURN item'})
+    assert client.post('http://localhost:8529/_db/test/_api/cursor', query).body['port'] in ports
+
+
+def test_writes_are_not_retried(ports, dead_port):
+    client = make_client([dead_port] + ports)
+    query = json.dumps({'query': 'FOR item IN @p0 INSERT item IN Person'})
+    with pytest.raises(ConnectionError):
+        client.post('http://localhost:8529/_db/test/_api/cursor', query)
+
+
+def test_lowercase_writes_are_not_retried(ports, dead_port):
+    client = make_client([dead_port] + ports)
+    query = json.dumps({'query': 'for item in @p0 insert item into Person', 'bindVars': {'p0': [{'a': 'x'}]}})
+    with pytest.raises(ConnectionError):
+        client.post('http://localhost:8529/_db/test/_api/cursor', query)
+
+
+def test_cursor_affinity(ports):
+    client = make_client(ports)
+    query = json.dumps({'query': 'FOR item IN Person RETURN item'})
+    created = client.post('http://localhost:8529/_db/test/_api/cursor', query).body
+    # Other requests move the round robin forward.
+    client.get('http://localhost:8529/_db/test/_api/version')
+    next_batch = client.put('http://localhost:8529/_db/test/_api/cursor/%s' % created['id'], None).body
+    assert next_batch['port'] == created['port']
+    # The cursor is done.
+    assert created['id'] not in client._cursors
+
+
+def test_pinned_cursors_bound(ports, monkeypatch):
+    monkeypatch.setattr('arangodb_driver.transport.MAX_PINNED_CURSORS', 2)
+    client = make_client(ports)
+    query = json.dumps({'query': 'FOR item IN Person RETURN item'})
+    ids = [client.post('http://localhost:8529/_db/test/_api/cursor', query).body['id'] for _ in ports]
+    # The cursors that were never read to the end don't pile up.
+    assert list(client._cursors) == ids[1:]
@@ -0,0 +1,60 @@
+import django
+import pytest
+from django.db import connection
+from django.db.models.sql import UpdateQuery
+from django.db.models.sql.constants import CURSOR
+
+django.setup()
+
+from arangodb_driver.models.fields import CharField
+from sample_app.models import Person
+
+
+class Musician(Person):
+    # A child model, its fields and the fields of Person are in two collections.
+    instrument = CharField(max_length=20)
+
+    class Meta:
+        app_label = 'sample_app'
+
+
+class StatementCursor(object):
+    """Records the executed statements, the queries read the keys of KEYS."""
+    KEYS = [['1'], ['2']]
+    rowcount = 1
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    def set_options(self, **options):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def batches(self):
+        yield self.KEYS
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    statements = []
+    monkeypatch.setattr(connection, 'cursor', lambda: StatementCursor(statements))
+    return statements
+
+
+def test_update_parent_fields(statements):
+    query = Musician.objects.filter(instrument='bass').query.clone(UpdateQuery)
+    query.add_update_values({'name': 'Foo', 'instrument': 'guitar'})
+    assert query.get_compiler('default').execute_sql(CURSOR) == 1
+    (select_sql, _), (update_sql, update_params), (parent_sql, parent_params) = statements
+    # The keys are read first, the documents of both collections are updated by them.
+    assert select_sql == 'FOR item IN sample_app_musician FILTER item.instrument == @p0 RETURN [item.person_ptr_id]'
+    assert update_sql.startswith('FOR item IN sample_app_musician FILTER item.person_ptr_id IN @p0 UPDATE')
+    assert update_params == (['1', '2'], 'guitar')
+    assert parent_sql == 'FOR item IN sample_app_person FILTER item._key IN @p0 ' \
+                         'UPDATE item WITH {name: @p1} IN sample_app_person'
+    assert parent_params == (['1', '2'], 'Foo')
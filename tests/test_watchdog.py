@@ -0,0 +1,71 @@
+import logging
+
+from arangodb_driver.profiling import QueryRecord
+from arangodb_driver.watchdog import QueryWatchdog, ReportLimiter
+
+
+def make_query(aql='FOR item IN Person FILTER item.name == @p0 RETURN item', scanned_full=0, rowcount=1):
+    return QueryRecord(aql=aql, bind_vars={'p0': 'Foo'}, rowcount=rowcount,
+                       stats={'scannedFull': scanned_full, 'scannedIndex': 0, 'executionTime': 0.01})
+
+
+def test_from_options():
+    assert QueryWatchdog.from_options({'BATCH_SIZE': 100}) is None
+    watchdog = QueryWatchdog.from_options({'SLOW_QUERY_THRESHOLD': 0.5, 'WATCHDOG_SAMPLE_RATE': 0.1})
+    assert watchdog.slow_threshold == 0.5
+    assert watchdog.full_scan_ratio is None
+    assert watchdog.sample_rate == 0.1
+
+
+def test_problems():
+    watchdog = QueryWatchdog(slow_threshold=0.5, full_scan_ratio=100, full_scan_min=1000)
+    assert watchdog.get_problems(make_query(scanned_full=500), 0.1) == []
+    # Many documents read for many rows.
+    assert watchdog.get_problems(make_query(scanned_full=50000, rowcount=1000), 0.1) == []
+    assert watchdog.get_problems(make_query(scanned_full=50000, rowcount=0), 0.6) == [
+        'Slow query (0.600s)', 'Full collection scan (50000 documents read without index for 0 rows)']
+
+
+def test_report_with_stack(caplog):
+    watchdog = QueryWatchdog(slow_threshold=0.5, limiter=ReportLimiter())
+    with caplog.at_level(logging.WARNING, logger='arangodb_driver.watchdog'):
+        watchdog.check(make_query(), 0.7)
+    record, = caplog.records
+    message = record.getMessage()
+    assert message.startswith('Slow query (0.700s): FOR item IN Person FILTER item.name == "Foo" RETURN item')
+    assert 'test_report_with_stack' in message
+    assert record.problems == ['Slow query (0.700s)']
+
+
+def test_not_reported(caplog):
+    watchdog = QueryWatchdog(slow_threshold=0.5, limiter=ReportLimiter())
+    query = make_query()
+    with caplog.at_level(logging.WARNING, logger='arangodb_driver.watchdog'):
+        watchdog.check(query, 0.1)
+    assert not caplog.records
+    # The values are only bound for the reports.
+    assert 'sql' not in query
+
+
+def test_rate_limit():
+    watchdog = QueryWatchdog(slow_threshold=0.5, interval=60, limiter=ReportLimiter())
+    assert watchdog.should_report('RETURN 1', now=1000)
+    assert not watchdog.should_report('RETURN 1', now=1030)
+    assert watchdog.should_report('RETURN 2', now=1030)
+    assert watchdog.should_report('RETURN 1', now=1061)
+
+
+def test_rate_limit_of_the_process():
+    # Each thread has its own watchdog, the reports are limited for all of them.
+    assert QueryWatchdog(slow_threshold=0.5).limiter is QueryWatchdog(slow_threshold=0.5).limiter
+    limiter = ReportLimiter()
+    assert QueryWatchdog(slow_threshold=0.5, limiter=limiter).should_report('RETURN 1', now=1000)
+    assert not QueryWatchdog(slow_threshold=0.5, limiter=limiter).should_report('RETURN 1', now=1030)
+
+
+def test_sampling(monkeypatch):
+    watchdog = QueryWatchdog(slow_threshold=0.5, sample_rate=0.25, limiter=ReportLimiter())
+    monkeypatch.setattr('arangodb_driver.watchdog.random.random', lambda: 0.5)
+    assert not watchdog.should_report('RETURN 1', now=1000)
+    monkeypatch.setattr('arangodb_driver.watchdog.random.random', lambda: 0.1)
+    assert watchdog.should_report('RETURN 1', now=1000)